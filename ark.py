@@ -1,19 +1,115 @@
 import pdfplumber
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+import argparse
+import atexit
+import contextlib
 import csv
+import hashlib
+import heapq
+import io
+import json
+import logging
+import mmap
+import multiprocessing
 import re
 import os
+import shutil
+import signal
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; document memory limits are skipped there
+    resource = None
+
+# Only needed for Parquet/Arrow output; imported by ArrowSink so other runs never load it
+pyarrow = None
+
+try:
+    import pypdfium2
+except ImportError:  # Only bundled with newer pdfplumber releases; page screening is skipped without it
+    pypdfium2 = None
 
 # Folder path and output CSV file, script will loop through each file
 PDF_FOLDER = "Contracts"
 OUTPUT_CSV = "output.csv"
 DEBUG_LOG = "debug_log.txt"
-DEBUG_MODE = True
+DEBUG_MODE = False
+LOG_LEVEL = "DEBUG" if DEBUG_MODE else "WARNING"
+LOG_BUFFER_RECORDS = 1000
+NUM_WORKERS = os.cpu_count() or 1
+MANIFEST_FILE = "manifest.jsonl"
+# Bump whenever extraction or parsing changes so --incremental re-processes every PDF
+EXTRACTOR_VERSION = "6"
+PAGE_CACHE_FILE = "page_cache.sqlite"
+PAGE_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Keyword arguments for page.extract_text; they are part of the page cache key
+TEXT_EXTRACTION_SETTINGS = {}
+# Only run full text extraction on pages whose raw text mentions one of PAGE_SCREEN_MARKERS
+PAGE_SCREENING = True
+PAGE_SCREEN_MARKERS = ("SCHEDULE OF SUPPLIES/SERVICES", "ITEM NO.", "REQUISITION NUMBER")
+# Take page text from pdfium's character stream and run the layout-aware extract_text only on
+# pages whose fast text fails fast_text_passes
+TIERED_EXTRACTION = False
+
+# Record per-stage wall time and write a JSON summary to TIMING_REPORT at the end of a batch
+PROFILING = False
+TIMING_REPORT = "timing_report.json"
+SLOWEST_REPORTED = 10
+
+# Per-document budgets. A document that runs over is recorded in ERROR_REPORT and the batch moves on.
+DOCUMENT_TIMEOUT = 900
+DOCUMENT_MEMORY_LIMIT_MB = None
+ERROR_REPORT = "errors.csv"
+# Rows buffered by the columnar and SQLite sinks before each write
+ARROW_BATCH_ROWS = 50000
+SQLITE_BATCH_ROWS = 5000
+SQLITE_TABLE = "line_items"
+# Parse byte-identical or content-identical copies once and tag the copies' rows with "Duplicate Of"
+DEDUPLICATE = True
+# Seconds between folder scans in --watch mode
+WATCH_INTERVAL = 5.0
+
+# How line items are read from schedule pages: "text" parses the layout-aware page text,
+# "geometry" reads table cells by column position from the character bounding boxes
+LINE_ITEM_ENGINE = "text"
+LINE_ITEM_ENGINES = ("text", "geometry")
+ENGINE_COMPARISON_REPORT = "engine_comparison.json"
+
+# Parse results of recently seen page texts kept per process, so repeated boilerplate pages are
+# parsed once; 0 turns the memo off. PARSE_MEMO_PATH adds a shared on-disk tier when set.
+PARSE_MEMO_ENTRIES = 4096
+PARSE_MEMO_FILE = "parse_memo.sqlite"
+PARSE_MEMO_PATH = None
+PARSE_MEMO_DISK_MAX_ENTRIES = 200000
+
+# Number of upcoming PDFs read on background threads while the current one is parsed; 0 turns it off
+READ_AHEAD = 4
+# Memory-map local PDFs and hand pdfplumber the mapping instead of a path
+MMAP_INPUT = True
+
+# Module settings the command line may override; worker processes are started with the same values
+WORKER_SETTINGS = (
+    "PAGE_SCREENING", "TIERED_EXTRACTION", "PROFILING", "DOCUMENT_TIMEOUT", "DOCUMENT_MEMORY_LIMIT_MB", "LINE_ITEM_ENGINE",
+    "PARSE_MEMO_ENTRIES", "PARSE_MEMO_PATH", "MMAP_INPUT",
+)
 
 COLUMNS = [
     "Source File", "PR Number", "PR Title", "CLIN", "SLIN", "Title", "Quantity", "Estimated Unit Price ($)",
     "Unit", "Amount ($)", "Amount Committed ($)", "Amount Reserved ($)", "Optional",
     "Not to Exceed", "Description", "POP Start Date", "POP End Date", "Group", "Line Item Type",
-    "NSP", "Place of Performance"
+    "NSP", "Place of Performance", "Duplicate Of"
 ]
 
 VALID_UNIT = {
@@ -24,100 +120,643 @@ VALID_UNIT = {
     "ST","SU","SV","SQ","SF","SY","YT","TD","TH","NT","TO","UN","WK","WM","YD","YR"
 }
 
-def log_debug(message):
-    if DEBUG_MODE:
-        with open(DEBUG_LOG, "a") as log_file:
-            log_file.write(message + "\n")
+# -----------------------------
+# Logging
+# -----------------------------
+
+logger = logging.getLogger("ark")
+
+# Set by start_logging so worker processes can forward their records to the same writer
+_log_queue = None
+
+def configure_worker_logging(queue, level):
+    # Records are formatted in the producing process and shipped to the listener in the parent,
+    # so every worker writes to the one log file without contending for it
+    logger.handlers[:] = [QueueHandler(queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+
+def start_logging(level=LOG_LEVEL, log_file=DEBUG_LOG):
+    global _log_queue
+
+    if os.path.exists(log_file):
+        os.remove(log_file)
+
+    file_handler = logging.FileHandler(log_file, delay=True)
+    file_handler.setFormatter(logging.Formatter("%(levelname)-7s [%(processName)s] %(message)s"))
+    # Batch records in memory and write them out in chunks instead of flushing every line
+    buffered_handler = MemoryHandler(LOG_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler)
+
+    # The parent writes its own records straight to the buffer; only worker records cross the
+    # queue, and the listener thread hands them to the same handler
+    _log_queue = multiprocessing.Queue(-1)
+    listener = QueueListener(_log_queue, buffered_handler)
+    listener.start()
+    logger.handlers[:] = [buffered_handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return listener
+
+def stop_logging(listener):
+    global _log_queue
+
+    listener.stop()
+    logger.handlers[:] = []
+    for handler in listener.handlers:
+        target = handler.target
+        handler.close()
+        target.close()
+    _log_queue = None
+
+# -----------------------------
+# Instrumentation
+# -----------------------------
+
+class StageTimings:
+    def __init__(self):
+        # stage -> [calls, total seconds]
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add_page_stage(self, stage, page_num, seconds):
+        self.add(stage, seconds)
+
+class DocumentTimings(StageTimings):
+    # Collected inside whichever process parses the document and sent back with its results
+
+    def __init__(self, source_file):
+        super().__init__()
+        self.source_file = source_file
+        self.seconds = 0.0
+        self.page_count = 0
+        self.line_item_count = 0
+        self.page_seconds = {}
+
+    def add_page_stage(self, stage, page_num, seconds):
+        self.add(stage, seconds)
+        self.page_seconds[page_num] = self.page_seconds.get(page_num, 0.0) + seconds
+
+class BatchTimings(StageTimings):
+    def __init__(self, top_n=SLOWEST_REPORTED):
+        super().__init__()
+        self.started = time.perf_counter()
+        self.top_n = top_n
+        self.documents = 0
+        self.pages = 0
+        self.line_items = 0
+        # Bounded min-heaps so memory stays flat however many files are processed
+        self.slowest_files = []
+        self.slowest_pages = []
+        self._sequence = 0
+
+    def _keep_slowest(self, heap, seconds, info):
+        self._sequence += 1
+        entry = (seconds, self._sequence, info)
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+        elif seconds > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def add_document(self, document):
+        for stage, (calls, seconds) in document.stages.items():
+            entry = self.stages.setdefault(stage, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        self.documents += 1
+        self.pages += document.page_count
+        self.line_items += document.line_item_count
+        self._keep_slowest(self.slowest_files, document.seconds, {
+            "file": document.source_file,
+            "seconds": round(document.seconds, 6),
+            "pages": document.page_count,
+            "line_items": document.line_item_count,
+        })
+        for page_num, seconds in document.page_seconds.items():
+            self._keep_slowest(self.slowest_pages, seconds, {
+                "file": document.source_file,
+                "page": page_num,
+                "seconds": round(seconds, 6),
+            })
+
+    def summary(self):
+        wall_seconds = time.perf_counter() - self.started
+        return {
+            "wall_seconds": round(wall_seconds, 6),
+            "documents": self.documents,
+            "pages": self.pages,
+            "line_items": self.line_items,
+            "pages_per_second": round(self.pages / wall_seconds, 3) if wall_seconds else None,
+            "line_items_per_second": round(self.line_items / wall_seconds, 3) if wall_seconds else None,
+            "stages": {
+                stage: {
+                    "calls": calls,
+                    "total_seconds": round(seconds, 6),
+                    "mean_ms": round(seconds * 1000 / calls, 4),
+                }
+                for stage, (calls, seconds) in sorted(self.stages.items(), key=lambda kv: -kv[1][1])
+            },
+            "slowest_files": [info for _, _, info in sorted(self.slowest_files, reverse=True)],
+            "slowest_pages": [info for _, _, info in sorted(self.slowest_pages, reverse=True)],
+        }
+
+    def write_report(self, path):
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+# The collector stage timings are recorded into, or None when profiling is off
+_timings = None
+_NULL_TIMER = contextlib.nullcontext()
+
+def stage_timer(stage):
+    if _timings is None:
+        return _NULL_TIMER
+    return _timings.timer(stage)
+
+# Extraction tier -> pages whose text it produced, for the document being parsed (_document_tiers)
+# and for the whole run (_batch_tiers); None unless TIERED_EXTRACTION is on
+_document_tiers = None
+_batch_tiers = None
+
+def count_page_tier(tier, pages=1):
+    if _document_tiers is not None:
+        _document_tiers[tier] = _document_tiers.get(tier, 0) + pages
+
+def timed_call(stage, function, *args):
+    if _timings is None:
+        return function(*args)
+    start = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        _timings.add(stage, time.perf_counter() - start)
 
 def get_filename_from_path(path):
+    if isinstance(path, ArchiveMember):
+        return path.name
     return os.path.basename(path)
 
+def hash_file(path):
+    if isinstance(path, ArchiveMember) and path.file_hash:
+        return path.file_hash
+    digest = hashlib.sha256()
+    with open_source_file(path) as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# -----------------------------
+# Input Sources
+# -----------------------------
+
+# Archives whose PDFs are read in place instead of being unpacked to disk first
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# Archive members up to this size are held in memory; larger ones spill to a temporary file
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+class ArchiveMember:
+    # A PDF inside a ZIP or TAR archive. Only paths, names and offsets are kept, so it
+    # pickles cheaply to worker processes, which read the member themselves. TAR members
+    # carry the byte range of their data in data_path: the archive itself when it is
+    # uncompressed, or the file a compressed archive was unpacked into while listing it.
+    __slots__ = ("archive", "member", "name", "data_path", "offset", "size", "file_hash")
+
+    def __init__(self, archive, member, name, data_path=None, offset=None, size=None, file_hash=None):
+        self.archive = archive
+        self.member = member
+        self.name = name
+        self.data_path = data_path
+        self.offset = offset
+        self.size = size
+        self.file_hash = file_hash
+
+    def __str__(self):
+        return os.path.join(self.archive, self.member)
+
+    def open(self):
+        # Streams the member into a spooled file positioned at the start
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            if self.offset is not None:
+                with open(self.data_path, "rb") as data:
+                    data.seek(self.offset)
+                    copy_bytes(data, spool, self.size)
+            else:
+                with zipfile.ZipFile(self.archive) as archive, archive.open(self.member) as member:
+                    shutil.copyfileobj(member, spool, 1 << 20)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+def copy_bytes(source, target, size):
+    while size > 0:
+        chunk = source.read(min(size, 1 << 20))
+        if not chunk:
+            raise OSError(f"Unexpected end of archive data in {source.name}")
+        target.write(chunk)
+        size -= len(chunk)
+
+def open_source_file(source):
+    # Binary file object for a path or an archive member. An already open file is rewound
+    # and handed back without being closed afterwards.
+    if isinstance(source, ArchiveMember):
+        return source.open()
+    if hasattr(source, "read"):
+        return contextlib.nullcontext(rewind(source))
+    return open(source, "rb")
+
+def map_pdf_file(path):
+    # Read-only mapping of a local PDF, or None for an empty file, which cannot be mapped.
+    # The mapping stays valid after the file itself is closed.
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+@contextlib.contextmanager
+def open_pdf_source(source):
+    # What pdfplumber and pypdfium2 should open: input already loaded by read-ahead, archive
+    # members as a spooled file, and local files as a memory map (or by path when mapping is off).
+    # Callers rewind file-like inputs between readers.
+    loaded = _loaded_inputs.pop(source, None)
+    if loaded is not None:
+        with loaded:
+            yield loaded
+        return
+    if isinstance(source, ArchiveMember):
+        with source.open() as file:
+            yield file
+        return
+    mapping = map_pdf_file(source) if MMAP_INPUT else None
+    if mapping is None:
+        yield source
+        return
+    with mapping:
+        yield mapping
+
+def rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+# -----------------------------
+# Read-Ahead
+# -----------------------------
+
+# Inputs loaded by read-ahead for the in-process batch loop, claimed by open_pdf_source
+_loaded_inputs = {}
+
+def load_pdf_input(source):
+    # Brings a source fully into memory so parsing never stalls on storage: archive members are
+    # spooled, local files mapped and faulted in (or read into a buffer when mapping is off)
+    if isinstance(source, ArchiveMember):
+        return source.open()
+    mapping = map_pdf_file(source) if MMAP_INPUT else None
+    if mapping is None:
+        with open(source, "rb") as file:
+            return io.BytesIO(file.read())
+    if hasattr(mapping, "madvise"):
+        mapping.madvise(mmap.MADV_WILLNEED)
+    while mapping.read(1 << 20):
+        pass
+    mapping.seek(0)
+    return mapping
+
+def warm_pdf_input(source):
+    # Reads a local file through once so a worker process finds it in the OS page cache.
+    # Archive members are left alone; the worker has to decompress them itself anyway.
+    if isinstance(source, ArchiveMember):
+        return None
+    buffer = bytearray(1 << 20)
+    with open(source, "rb") as file:
+        while file.readinto(buffer):
+            pass
+    return None
+
+def iter_read_ahead(sources, load, depth=None):
+    # Yields (source, load(source)) in order while up to depth (default READ_AHEAD) later sources
+    # load on background threads. A failed load yields None, leaving the error to surface when the
+    # document is parsed.
+    if depth is None:
+        depth = READ_AHEAD
+    if depth <= 0:
+        for source in sources:
+            yield source, None
+        return
+
+    pending = deque()
+    remaining = iter(sources)
+    with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="read-ahead") as executor:
+        try:
+            while True:
+                while len(pending) <= depth:
+                    source = next(remaining, None)
+                    if source is None:
+                        break
+                    pending.append((source, executor.submit(load, source)))
+                if not pending:
+                    break
+                source, future = pending.popleft()
+                try:
+                    loaded = future.result()
+                except Exception as e:
+                    logger.debug("Read-ahead of %s failed: %s", source, e)
+                    loaded = None
+                yield source, loaded
+        finally:
+            # Release anything loaded for documents that will not be parsed now
+            for _, future in pending:
+                if future.cancel():
+                    continue
+                with contextlib.suppress(Exception):
+                    loaded = future.result()
+                    if loaded is not None:
+                        loaded.close()
+
+# Files that compressed TAR archives were unpacked into, removed when the run exits
+_unpacked_archives = []
+
+@atexit.register
+def remove_unpacked_archives():
+    while _unpacked_archives:
+        try:
+            os.remove(_unpacked_archives.pop())
+        except OSError:
+            pass
+
+def list_tar_members(archive_path, name_prefix):
+    # An uncompressed TAR is read in place at each member's data offset. A compressed one
+    # has no index, so reaching a member means decompressing everything before it; it is
+    # streamed once instead, copying the PDF members into an unpacked file and hashing each
+    # on the way, so workers seek straight to their member and no one hashes it again.
+    try:
+        with tarfile.open(archive_path, "r:") as archive:
+            return [
+                (name_prefix + info.name, ArchiveMember(
+                    archive_path, info.name, name_prefix + info.name,
+                    archive_path, info.offset_data, info.size,
+                ))
+                for info in archive
+                if info.isfile() and info.name.lower().endswith(".pdf")
+            ]
+    except tarfile.ReadError:
+        pass
+
+    members = []
+    unpacked = tempfile.NamedTemporaryFile(prefix="ark-", suffix=".tar-unpacked", delete=False)
+    _unpacked_archives.append(unpacked.name)
+    with unpacked, tarfile.open(archive_path, "r|*") as archive:
+        for info in archive:
+            if not (info.isfile() and info.name.lower().endswith(".pdf")):
+                continue
+            offset = unpacked.tell()
+            digest = hashlib.sha256()
+            with archive.extractfile(info) as member:
+                for chunk in iter(lambda: member.read(1 << 20), b""):
+                    digest.update(chunk)
+                    unpacked.write(chunk)
+            members.append((name_prefix + info.name, ArchiveMember(
+                archive_path, info.name, name_prefix + info.name,
+                unpacked.name, offset, info.size, digest.hexdigest(),
+            )))
+    return members
+
+def list_archive_members(archive_path, name_prefix):
+    # PDF members in the order they are stored in the archive
+    if not archive_path.lower().endswith(".zip"):
+        return list_tar_members(archive_path, name_prefix)
+    with zipfile.ZipFile(archive_path) as archive:
+        members = [info.filename for info in archive.infolist() if not info.is_dir()]
+    return [
+        (name_prefix + member, ArchiveMember(archive_path, member, name_prefix + member))
+        for member in members if member.lower().endswith(".pdf")
+    ]
+
+def list_pdf_sources(root, recursive=False, name_prefix=""):
+    # Returns (name, source) pairs for every PDF under root, which may be a folder or an archive.
+    # Folder entries are sorted; archive members keep archive order. Names are relative to root,
+    # so PDFs directly in a folder keep their plain file names.
+    if os.path.isfile(root):
+        return list_archive_members(root, name_prefix)
+
+    sources = []
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry)
+        name = name_prefix + entry
+        if os.path.isdir(path):
+            if recursive:
+                sources.extend(list_pdf_sources(path, True, name + "/"))
+        elif entry.lower().endswith(".pdf"):
+            sources.append((name, path))
+        elif is_archive(entry):
+            sources.extend(list_archive_members(path, name + "/"))
+    return sources
+
 # -----------------------------
 # Field Extractor Functions
 # -----------------------------
 
+PR_NUMBER_PATTERN = re.compile(r"RCS-[A-Z0-9\-]+")
+
 def extract_pr_number(lines):
     for i, line in enumerate(lines):
         if "REQUISITION NUMBER" in line.upper():
             for j in range(1, 4):
                 if i + j < len(lines):
                     candidate = lines[i + j].strip()
-                    match = re.search(r"RCS-[A-Z0-9\-]+", candidate)
+                    match = PR_NUMBER_PATTERN.search(candidate)
                     if match:
                         return match.group(0)
-    return "N/A"
+    return None
 
 def extract_pr_title(lines):
     return "N/A"
 
+# Document-level fields. An extractor returns None when the page doesn't contain its field;
+# fields nothing was found for are reported as "N/A".
 TEXT_FIELD_EXTRACTORS = {
     "PR Number": extract_pr_number,
     "PR Title": extract_pr_title,
 }
 
-def parse_text_content(text):
+def parse_text_content(text, extractors=None):
+    if extractors is None:
+        extractors = TEXT_FIELD_EXTRACTORS
     structured_fields = {}
     lines = text.split("\n")
 
-    for field, extractor in TEXT_FIELD_EXTRACTORS.items():
+    for field, extractor in extractors.items():
         try:
             value = extractor(lines)
             if value:
                 structured_fields[field] = value
-                log_debug(f"Extracted {field}: {value}")
+                logger.debug("Extracted %s: %s", field, value)
+        except Exception as e:
+            logger.error("Error extracting %s: %s", field, e)
+
+    return structured_fields
+
+class DocumentFieldResolver:
+    # Resolves TEXT_FIELD_EXTRACTORS once per document. Pages are fed in page order, the first
+    # value found for a field wins, and pages stop being scanned once every field has a value.
+
+    def __init__(self):
+        self.fields = {}
+        self.pending = dict(TEXT_FIELD_EXTRACTORS)
+
+    @property
+    def done(self):
+        return not self.pending
+
+    def feed(self, text):
+        if not self.pending:
+            return
+        if PARSE_MEMO_ENTRIES:
+            # The memo holds every field found on the page, so one entry serves any document
+            page_fields = memoized_page_parse("fields", parse_text_content, text)
+        else:
+            page_fields = parse_text_content(text, self.pending)
+        for field in list(self.pending):
+            if field in page_fields:
+                self.fields[field] = page_fields[field]
+                del self.pending[field]
+
+    def result(self):
+        fields = {field: "N/A" for field in self.pending}
+        fields.update(self.fields)
+        return fields
+
+# Table-backed field extractors receive the rows of each page's extract_table().
+# Table detection is expensive, so it only runs while at least one is registered.
+TABLE_FIELD_EXTRACTORS = {}
+
+def parse_table_content(rows):
+    structured_fields = {}
+
+    for field, extractor in TABLE_FIELD_EXTRACTORS.items():
+        try:
+            value = extractor(rows)
+            if value:
+                structured_fields[field] = value
+                logger.debug("Extracted %s from table: %s", field, value)
         except Exception as e:
-            log_debug(f"Error extracting {field}: {e}")
+            logger.error("Error extracting %s from table: %s", field, e)
 
     return structured_fields
 
+# -----------------------------
+# Line Item Tokenizer
+# -----------------------------
+
+LINE_ITEM_PATTERN = re.compile(r"^(\d{4}[A-Z]{0,2})\s+(.*)")
+CLIN_CODE_PATTERN = re.compile(r"\d{4}$")
+SLIN_CODE_PATTERN = re.compile(r"\d{4}[A-Z]+$")
+QUANTITY_PATTERN = re.compile(r"\d{1,4}")
+MONEY_PATTERN = re.compile(r"\d{1,3}(?:,\d{3})*(?:\.\d{2})")
+MONEY_OR_NSP_PATTERN = re.compile(r"\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})|NSP", re.IGNORECASE)
+DATE_PATTERN = re.compile(r"\b\d{2}/\d{2}/\d{4}\b")
+
+# Phrases the keyword-driven extractors look for in the lowercased line
+LINE_ITEM_KEYWORDS = (
+    "option period", "optional goods or services", "alternate",
+    "not to exceed quantity and price", "not to exceed quantity", "not to exceed price",
+    "nsn", "not separately priced",
+)
+
+def find_quantity_index(tokens):
+    # Quantity must be directly followed by a known unit
+    for i in range(len(tokens) - 1):
+        if tokens[i + 1] in VALID_UNIT and QUANTITY_PATTERN.fullmatch(tokens[i]):
+            return i
+    return None
+
+class LineItemTokens:
+    # Tokenizes and classifies a matched CLIN/SLIN line once so every field extractor
+    # reads from the same structure instead of re-splitting and re-scanning the text
+
+    __slots__ = (
+        "code", "line", "segment_tokens", "quantity_index", "unit",
+        "money_tokens", "amount", "dates", "keywords",
+    )
+
+    def __init__(self, match):
+        self.code = match.group(1)
+        self.line = match.group(0).strip()
+        self.segment_tokens = match.group(2).split()
+        self.quantity_index = find_quantity_index(self.segment_tokens)
+        self.unit = next((token for token in self.segment_tokens if token in VALID_UNIT), None)
+
+        # Dollar values and NSP markers anywhere in the line, in order of appearance
+        self.money_tokens = MONEY_OR_NSP_PATTERN.findall(self.line)
+
+        # The amount is the right-most whitespace token that is a dollar value or NSP
+        self.amount = None
+        for token in reversed(self.line.split()):
+            cleaned = token.replace("$", "").strip()
+            if cleaned.upper() == "NSP":
+                self.amount = "NSP"
+                break
+            if MONEY_PATTERN.fullmatch(cleaned):
+                self.amount = cleaned
+                break
+
+        self.dates = DATE_PATTERN.findall(self.line)
+        lowered = self.line.lower()
+        self.keywords = frozenset(keyword for keyword in LINE_ITEM_KEYWORDS if keyword in lowered)
+
+    @property
+    def has_dollar_value(self):
+        return any(token.upper() != "NSP" for token in self.money_tokens)
+
 # -----------------------------
 # Line Item Extractors
 # -----------------------------
 
-def extract_lineitem_clin_or_slin(match):
-    code = match.group(1)
-    if re.match(r"\d{4}$", code):
+def extract_lineitem_clin_or_slin(tokens):
+    code = tokens.code
+    if CLIN_CODE_PATTERN.match(code):
         return code, "N/A"
-    elif re.match(r"\d{4}[A-Z]+$", code):
+    elif SLIN_CODE_PATTERN.match(code):
         return code[:4], code
     return code, "N/A"
 
-def extract_lineitem_title(match):
-    full_text = match.group(2)
-    tokens = full_text.split()
-
-    # Reverse scan to find and remove Quantity + Unit pattern (e.g., "1 LO")
-    cleaned_tokens = tokens.copy()
-    for i in range(len(tokens) - 2, -1, -1):
-        quantity_token = tokens[i]
-        unit_token = tokens[i + 1]
-        if re.fullmatch(r"\d{1,4}", quantity_token) and unit_token in VALID_UNIT:
-            cleaned_tokens = tokens[:i]
-            break
-
-    return " ".join(cleaned_tokens).strip()
-
-def extract_multiline_title(lines, start_index, parsed_values):
-    cutoff_prefixes = [
-        "Qty", "Award Type", "Obligated Amount", "Continued", "FOB", "Delivery",
-        "Packaging", "Inspection", "Period of Performance", "Ceiling Amount",
-        "Accounting Info", "Signature"
-    ]
+def extract_lineitem_title(tokens):
+    # Drop everything from the trailing Quantity + Unit pattern (e.g., "1 LO") onwards
+    segment_tokens = tokens.segment_tokens
+    for i in range(len(segment_tokens) - 2, -1, -1):
+        if QUANTITY_PATTERN.fullmatch(segment_tokens[i]) and segment_tokens[i + 1] in VALID_UNIT:
+            return " ".join(segment_tokens[:i]).strip()
 
-    # Pull values for targeted cleanup
-    clin = parsed_values.get("clin", "")
-    quantity = parsed_values.get("quantity", "")
-    unit = parsed_values.get("unit", "")
-    amount = parsed_values.get("amount", "")
-    unit_price = parsed_values.get("unit_price", "")
-    flags = parsed_values.get("flags", [])
+    return " ".join(segment_tokens).strip()
 
-    title_lines = []
-    for i in range(start_index, len(lines)):
-        line = lines[i].strip()
-        if any(line.startswith(prefix) for prefix in cutoff_prefixes):
-            break
-        title_lines.append(line)
+# Lines starting with one of these end a multi-line title
+TITLE_CUTOFF_PREFIXES = (
+    "Qty", "Award Type", "Obligated Amount", "Continued", "FOB", "Delivery",
+    "Packaging", "Inspection", "Period of Performance", "Ceiling Amount",
+    "Accounting Info", "Signature"
+)
+
+def extract_multiline_title(stripped_lines, start_index, end_index, parsed_values):
+    title_lines = stripped_lines[start_index:end_index]
 
     # Step 1: Combine lines
     full_title = " ".join(title_lines).strip()
@@ -131,292 +770,2141 @@ def extract_multiline_title(lines, start_index, parsed_values):
     clin = parsed_values.get("clin", "").strip()
 
     # Log what we're trying to remove
-    log_debug(f"--- Title Cleanup Start ---")
-    log_debug(f"Raw Title Lines: {' | '.join(title_lines)}")
-    log_debug(f"Parsed values: quantity={quantity}, unit={unit}, unit_price={unit_price}, amount={amount}, flags={flags}, clin={clin}")
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("--- Title Cleanup Start ---")
+        logger.debug("Raw Title Lines: %s", " | ".join(title_lines))
+        logger.debug("Parsed values: quantity=%s, unit=%s, unit_price=%s, amount=%s, flags=%s, clin=%s",
+                     quantity, unit, unit_price, amount, flags, clin)
 
     # Strip CLIN/SLIN code from start if present
     if clin and full_title.startswith(clin):
         full_title = full_title[len(clin):].strip()
 
     # Token-based stripping
-    tokens = full_title.split()
+    removable_values = (quantity, unit_price, amount)
     cleaned_tokens = []
-    for token in tokens:
+    for token in full_title.split():
         normalized = token.replace(",", "").replace("$", "")
-        if normalized in [quantity, unit_price, amount] or token in flags or token == unit:
-            log_debug(f"Removing token from title: {token}")
+        if normalized in removable_values or token in flags or token == unit:
+            if debug:
+                logger.debug("Removing token from title: %s", token)
             continue
         cleaned_tokens.append(token)
 
     cleaned_title = " ".join(cleaned_tokens).strip()
-    log_debug(f"Cleaned Title: {cleaned_title}")
-    log_debug(f"--- Title Cleanup End ---")
+    if debug:
+        logger.debug("Cleaned Title: %s", cleaned_title)
+        logger.debug("--- Title Cleanup End ---")
     return cleaned_title
 
-def extract_lineitem_quantity(match, is_slin):
-    text_segment = match.group(2)
-    tokens = text_segment.split()
-
-    for i in range(len(tokens) - 1):
-        token = tokens[i]
-        next_token = tokens[i + 1] if i + 1 < len(tokens) else ""
-
-        # Quantity must be directly followed by a known unit
-        if re.fullmatch(r"\d{1,4}", token) and next_token in VALID_UNIT:
-            return token
+def extract_lineitem_quantity(tokens, is_slin):
+    if tokens.quantity_index is None:
+        return "N/A"
+    return tokens.segment_tokens[tokens.quantity_index]
 
+def extract_lineitem_unit_price(tokens, is_slin):
+    # With a single dollar value that value is the amount, so a unit price needs two
+    if len(tokens.money_tokens) >= 2:
+        return tokens.money_tokens[-2].replace("$", "")
     return "N/A"
 
-def extract_lineitem_unit_price(match, is_slin):
-    try:
-        full_line = match.group(0).strip()
+def extract_lineitem_unit(tokens, is_slin):
+    return tokens.unit or "N/A"
 
-        # Find all valid dollar values or NSP
-        tokens = re.findall(r"\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})|NSP", full_line, flags=re.IGNORECASE)
-
-        if len(tokens) >= 2:
-            return tokens[-2].replace("$", "")
-        elif len(tokens) == 1:
-            return "N/A"  # That one value is already the amount
-    except Exception as e:
-        log_debug(f"[ERROR] extract_lineitem_unit_price failed: {e}")
-
-    return "N/A"
-
-def extract_lineitem_unit(match, is_slin):
-    text_segment = match.group(2).split()
-    for token in text_segment:
-        if token in VALID_UNIT:
-            return token
-    return "N/A"
-
-def extract_lineitem_amount(match):
-    try:
-        line = match.group(0).strip()
-        tokens = line.split()
-
-        for token in reversed(tokens):
-            cleaned = token.replace("$", "").strip()
-            if cleaned.upper() == "NSP":
-                return "NSP"
-            if re.fullmatch(r"\d{1,3}(?:,\d{3})*(?:\.\d{2})", cleaned):
-                return cleaned
-    except Exception as e:
-        log_debug(f"[ERROR] extract_lineitem_amount failed: {e}")
-
-    return "N/A"
+def extract_lineitem_amount(tokens):
+    return tokens.amount or "N/A"
 
 # -----------------------------
 # Placeholder Line Item Field Extractors
 # -----------------------------
 
-def extract_lineitem_amount_committed(match):
+def extract_lineitem_amount_committed(tokens):
     return "N/A"
 
-def extract_lineitem_amount_reserved(match):
+def extract_lineitem_amount_reserved(tokens):
     return "N/A"
 
-def extract_lineitem_optional(match):
-    text = match.group(0).lower()
-    if "option period" in text:
+def extract_lineitem_optional(tokens):
+    keywords = tokens.keywords
+    if "option period" in keywords:
         return "Option Period"
-    if "optional goods or services" in text:
+    if "optional goods or services" in keywords:
         return "Optional Goods or Services"
-    if "alternate" in text:
+    if "alternate" in keywords:
         return "Alternate"
     return "Not Applicable"
 
-def extract_lineitem_not_to_exceed(match):
-    text = match.group(0).lower()
-    if "not to exceed quantity and price" in text:
+def extract_lineitem_not_to_exceed(tokens):
+    keywords = tokens.keywords
+    if "not to exceed quantity and price" in keywords:
         return "Both"
-    if "not to exceed quantity" in text:
+    if "not to exceed quantity" in keywords:
         return "Quantity"
-    if "not to exceed price" in text:
+    if "not to exceed price" in keywords:
         return "Price"
     return "Not Applicable"
 
-def extract_lineitem_description(match):
-    return match.group(0).strip()
+def extract_lineitem_description(tokens):
+    return tokens.line
 
-def extract_lineitem_pop_start_date(match):
-    text = match.group(0)
-    dates = re.findall(r"\b\d{2}/\d{2}/\d{4}\b", text)
-    return dates[0] if len(dates) >= 1 else "N/A"
+def extract_lineitem_pop_start_date(tokens):
+    return tokens.dates[0] if len(tokens.dates) >= 1 else "N/A"
 
-def extract_lineitem_pop_end_date(match):
-    text = match.group(0)
-    dates = re.findall(r"\b\d{2}/\d{2}/\d{4}\b", text)
-    return dates[1] if len(dates) >= 2 else "N/A"
+def extract_lineitem_pop_end_date(tokens):
+    return tokens.dates[1] if len(tokens.dates) >= 2 else "N/A"
 
-def extract_lineitem_group(match):
+def extract_lineitem_group(tokens):
     return "N/A"
 
-def extract_lineitem_line_item_type(match):
-    text = match.group(0).lower()
-    if "nsn" in text or "not separately priced" in text:
+def extract_lineitem_line_item_type(tokens):
+    if "nsn" in tokens.keywords or "not separately priced" in tokens.keywords:
         return "Informational"
-    if re.search(r"\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})", text):
+    if tokens.has_dollar_value:
         return "Deliverable"
     return "Informational"
 
-def extract_lineitem_nsp(match):
-    text = match.group(0).lower()
-    return "Yes" if "not separately priced" in text else "No"
+def extract_lineitem_nsp(tokens):
+    return "Yes" if "not separately priced" in tokens.keywords else "No"
 
-def extract_lineitem_place_of_performance(match):
+def extract_lineitem_place_of_performance(tokens):
     return "N/A"
 
+# Extractors that only need the tokenized line, in output column order
+LINE_ITEM_FIELD_EXTRACTORS = {
+    "Amount Committed ($)": extract_lineitem_amount_committed,
+    "Amount Reserved ($)": extract_lineitem_amount_reserved,
+    "Optional": extract_lineitem_optional,
+    "Not to Exceed": extract_lineitem_not_to_exceed,
+    "Description": extract_lineitem_description,
+    "POP Start Date": extract_lineitem_pop_start_date,
+    "POP End Date": extract_lineitem_pop_end_date,
+    "Group": extract_lineitem_group,
+    "Line Item Type": extract_lineitem_line_item_type,
+    "NSP": extract_lineitem_nsp,
+    "Place of Performance": extract_lineitem_place_of_performance,
+}
+
+# -----------------------------
+# Line Item Records
+# -----------------------------
+
+# Fields of a line item, in output order; they sit contiguously inside COLUMNS
+LINE_ITEM_COLUMNS = ("CLIN", "SLIN", "Title", "Quantity", "Estimated Unit Price ($)", "Unit",
+                     "Amount ($)") + tuple(LINE_ITEM_FIELD_EXTRACTORS)
+LINE_ITEM_INDEX = {col: i for i, col in enumerate(LINE_ITEM_COLUMNS)}
+_ITEM_START = COLUMNS.index(LINE_ITEM_COLUMNS[0])
+_ITEM_END = _ITEM_START + len(LINE_ITEM_COLUMNS)
+assert tuple(COLUMNS[_ITEM_START:_ITEM_END]) == LINE_ITEM_COLUMNS
+# Document-level columns before and after the line item fields
+DOCUMENT_PREFIX_COLUMNS = COLUMNS[:_ITEM_START]
+DOCUMENT_SUFFIX_COLUMNS = COLUMNS[_ITEM_END:]
+
+class LineItem(tuple):
+    # A line item's values in LINE_ITEM_COLUMNS order. Being a tuple it carries no per-item dict,
+    # is safe to share from caches, pickles compactly and JSON-encodes as a plain list.
+    # Fields can still be read by column name, e.g. item["CLIN"].
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = LINE_ITEM_INDEX[key]
+        return tuple.__getitem__(self, key)
+
+    def items(self):
+        return zip(LINE_ITEM_COLUMNS, self)
+
+def decode_line_items(values):
+    # Line items read back from JSON (manifest, parse memo) arrive as lists
+    return [LineItem(item) for item in values]
+
 # -----------------------------
 # Line Item Parser
 # -----------------------------
 
+SCHEDULE_HEADER_MARKERS = ("ITEM NO.", "SCHEDULE OF SUPPLIES/SERVICES")
+
+def is_schedule_header(line):
+    return any(marker in line for marker in SCHEDULE_HEADER_MARKERS)
+
+# Lines that open a new part of the contract rather than continue a line item's title
+SECTION_START_PATTERN = re.compile(r"^(SECTION\b|PART\b|\d{2}\.\d{3}-\d+)", re.IGNORECASE)
+
+def is_title_text(line):
+    return bool(line) and not line.startswith(TITLE_CUTOFF_PREFIXES) and not SECTION_START_PATTERN.match(line)
+
+def continues_schedule(lines, title_open):
+    # Whether a page without a table header carries on the previous page's schedule: it must start
+    # with a line item or, while an item's title is open, with more title text
+    first_line = next((line.strip() for line in lines if line.strip()), "")
+    if LINE_ITEM_PATTERN.match(first_line):
+        return True
+    return title_open and is_title_text(first_line)
+
+class OpenLineItem:
+    # A line item whose title may still continue on the following lines
+    __slots__ = ("tokens", "clin", "slin", "parsed_values", "title_lines")
+
+    def __init__(self, tokens, clin, slin, parsed_values, line):
+        self.tokens = tokens
+        self.clin = clin
+        self.slin = slin
+        self.parsed_values = parsed_values
+        self.title_lines = [line]
+
+class ScheduleParser:
+    # Reads the schedule of supplies/services as one stream of lines across pages. Capture state
+    # and a line item whose title is still open carry over page boundaries, so a title that runs
+    # onto the next page is completed there. Only the current page and one open item are held.
+    #
+    # State carries over only while the schedule is visibly continuing: an item's title is still
+    # open, or the page's schedule ended with "Continued ...". On a continuation page that repeats
+    # the table header, the page furniture above the header is skipped; one without a header must
+    # start with a line item (or, while a title is open, title text) for the state to carry on.
+    # Otherwise the state is closed at the page boundary, as it is by finish() for a page break.
+
+    def __init__(self):
+        self.capture = False
+        self.open_item = None
+        self.continued = False
+
+    @property
+    def idle(self):
+        return not self.capture and self.open_item is None
+
+    def feed_page(self, text):
+        # Returns the line items completed on this page
+        if not self.idle or not PARSE_MEMO_ENTRIES:
+            return self._parse_page(text)
+
+        # A page entered without carried state parses the same wherever it appears. Pages that
+        # leave an item open are not memoized; otherwise the memo also records whether capture
+        # continues onto the next page.
+        key = page_memo_key("schedule", text)
+        memo = get_page_memo()
+        cached = memo.get(key, decode_schedule_page)
+        if cached is not None:
+            self.capture, line_items = cached
+            self.continued = self.capture
+            return line_items
+        line_items = self._parse_page(text)
+        if self.open_item is None:
+            memo.put(key, (self.capture, line_items))
+        return line_items
+
+    def finish(self):
+        # Emits the item left open at the end of the document (or before a page read another way)
+        line_items = []
+        if self.open_item is not None:
+            line_items.append(self._close_item())
+        self.capture = False
+        self.continued = False
+        return line_items
+
+    def _parse_page(self, text):
+        lines = text.split("\n")
+        line_items = []
+        start = 0
+        if not self.idle:
+            header_index = next((i for i, line in enumerate(lines) if is_schedule_header(line)), None)
+            if header_index is not None:
+                # Skip the continuation sheet's page furniture and the repeated table header
+                start = header_index + 1
+            elif not continues_schedule(lines, self.open_item is not None):
+                line_items.extend(self.finish())
+        if self.idle:
+            # Nothing carries into this page, so nothing from earlier pages may leak into its result
+            self.continued = False
+
+        for line in lines[start:]:
+            stripped = line.strip()
+
+            open_item = self.open_item
+            if open_item is not None:
+                if stripped.startswith(TITLE_CUTOFF_PREFIXES) or LINE_ITEM_PATTERN.match(stripped):
+                    line_items.append(self._close_item())
+                else:
+                    open_item.title_lines.append(stripped)
+
+            if is_schedule_header(line):
+                self.capture = True
+                continue
+
+            if self.capture:
+                if stripped:
+                    self.continued = "Continued ..." in line
+                if "Continued ..." in line:
+                    continue
+
+                match = LINE_ITEM_PATTERN.match(stripped)
+                if match:
+                    self.open_item = self._open_item(match, stripped)
+
+        if self.open_item is None and not self.continued:
+            self.capture = False
+        return line_items
+
+    def _open_item(self, match, line):
+        tokens = timed_call("tokenize_line_item", LineItemTokens, match)
+        clin, slin = timed_call("extract_lineitem_clin_or_slin", extract_lineitem_clin_or_slin, tokens)
+        is_slin = slin != "N/A"
+
+        # Extract all other values first
+        quantity = timed_call("extract_lineitem_quantity", extract_lineitem_quantity, tokens, is_slin)
+        unit = timed_call("extract_lineitem_unit", extract_lineitem_unit, tokens, is_slin)
+        unit_price = timed_call("extract_lineitem_unit_price", extract_lineitem_unit_price, tokens, is_slin)
+        amount = timed_call("extract_lineitem_amount", extract_lineitem_amount, tokens)
+
+        # NSP check: if unit price or amount is NSP, include that as a flag
+        flags = []
+        if unit_price.upper() == "NSP" or amount.upper() == "NSP":
+            flags.append("NSP")
+
+        parsed_values = {
+            "clin": slin if is_slin else clin,
+            "quantity": quantity,
+            "unit": unit,
+            "unit_price": unit_price,
+            "amount": amount,
+            "flags": flags
+        }
+        return OpenLineItem(tokens, clin, slin, parsed_values, line)
+
+    def _close_item(self):
+        open_item, self.open_item = self.open_item, None
+        tokens, parsed_values = open_item.tokens, open_item.parsed_values
+        title_lines = open_item.title_lines
+        title_text = timed_call("extract_multiline_title", extract_multiline_title,
+                                title_lines, 0, len(title_lines), parsed_values)
+
+        values = [open_item.clin, open_item.slin, title_text, parsed_values["quantity"],
+                  parsed_values["unit_price"], parsed_values["unit"], parsed_values["amount"]]
+        if _timings is None:
+            for extractor in LINE_ITEM_FIELD_EXTRACTORS.values():
+                values.append(extractor(tokens))
+        else:
+            for extractor in LINE_ITEM_FIELD_EXTRACTORS.values():
+                values.append(timed_call(extractor.__name__, extractor, tokens))
+        item = LineItem(values)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Line Item Extracted from Text:")
+            for key, val in item.items():
+                logger.debug("  %-30s: %s", key, val)
+            logger.debug("----------------------------------------")
+        return item
+
 def parse_line_items_from_text(text):
-    lines = text.split("\n")
-    line_items = []
-    capture = False
-    pattern = re.compile(r"^(\d{4}[A-Z]{0,2})\s+(.*)")
+    # Parses one page on its own, with nothing carried in or out
+    parser = ScheduleParser()
+    return parser.feed_page(text) + parser.finish()
 
-    for i, line in enumerate(lines):
-        if "ITEM NO." in line or "SCHEDULE OF SUPPLIES/SERVICES" in line:
-            capture = True
-            continue
+# -----------------------------
+# Table Geometry Engine
+# -----------------------------
 
-        if capture:
-            if "Continued ..." in line:
-                continue
+# Column headers of the schedule table, left to right
+SCHEDULE_COLUMN_LABELS = ("ITEM NO.", "SUPPLIES/SERVICES", "QUANTITY", "UNIT", "UNIT PRICE", "AMOUNT")
+# Gaps between characters, as a fraction of the font size, that separate words and table cells
+WORD_GAP_RATIO = 0.15
+CELL_GAP_RATIO = 0.7
+LINE_TOLERANCE = 3
+
+def group_chars_into_lines(chars):
+    # One pass over the characters sorted by vertical position; each line is sorted left to right
+    lines = []
+    current = []
+    current_top = None
+    for char in sorted(chars, key=lambda c: c["top"]):
+        if current and char["top"] - current_top > LINE_TOLERANCE:
+            lines.append(sorted(current, key=lambda c: c["x0"]))
+            current = []
+        if not current:
+            current_top = char["top"]
+        current.append(char)
+    if current:
+        lines.append(sorted(current, key=lambda c: c["x0"]))
+    return lines
+
+def split_line_into_chunks(line_chars):
+    # Returns (x0, x1, text) runs of characters separated by cell-sized gaps
+    chunks = []
+    text = []
+    x0 = x1 = None
+    for char in line_chars:
+        gap = char["x0"] - x1 if x1 is not None else 0
+        size = char.get("size") or 10
+        if text and gap > size * CELL_GAP_RATIO:
+            chunks.append((x0, x1, " ".join("".join(text).split())))
+            text = []
+        if not text:
+            x0 = char["x0"]
+        elif gap > size * WORD_GAP_RATIO:
+            text.append(" ")
+        text.append(char["text"])
+        x1 = char["x1"]
+    if text:
+        chunks.append((x0, x1, " ".join("".join(text).split())))
+    return [chunk for chunk in chunks if chunk[2]]
+
+def find_schedule_columns(lines):
+    # Locates the header row and returns (header bottom, left edge of each column label)
+    for line_chars in lines:
+        positions = []
+        text = ""
+        prev = None
+        for char in line_chars:
+            if prev is not None and char["x0"] - prev["x1"] > (char.get("size") or 10) * WORD_GAP_RATIO:
+                text += " "
+                positions.append(char["x0"])
+            text += char["text"]
+            positions.append(char["x0"])
+            prev = char
+        if "ITEM NO." not in text or "AMOUNT" not in text:
+            continue
 
-            match = pattern.match(line.strip())
-            if match:
-                clin, slin = extract_lineitem_clin_or_slin(match)
-                is_slin = slin != "N/A"
-
-                # Extract all other values first
-                quantity = extract_lineitem_quantity(match, is_slin)
-                unit = extract_lineitem_unit(match, is_slin)
-                unit_price = extract_lineitem_unit_price(match, is_slin)
-                amount = extract_lineitem_amount(match)
-
-                # NSP check: if unit price or amount is NSP, include that as a flag
-                flags = []
-                if unit_price.upper() == "NSP" or amount.upper() == "NSP":
-                    flags.append("NSP")
-
-                parsed_values = {
-                    "clin": slin if is_slin else clin,
-                    "quantity": quantity,
-                    "unit": unit,
-                    "unit_price": unit_price,
-                    "amount": amount,
-                    "flags": flags
-                }
+        column_edges = []
+        search_from = 0
+        for label in SCHEDULE_COLUMN_LABELS:
+            index = text.find(label, search_from)
+            if index < 0:
+                break
+            column_edges.append(positions[index])
+            search_from = index + len(label)
+        if len(column_edges) == len(SCHEDULE_COLUMN_LABELS):
+            return max(char["bottom"] for char in line_chars), column_edges
+    return None
+
+def assign_cells(chunks, column_edges):
+    # Text is placed by its left edge; numbers by their right edge, since they are often right-aligned
+    cells = [[] for _ in column_edges]
+    for x0, x1, text in chunks:
+        anchor = x1 - 0.5 if text[-1].isdigit() else x0 + 0.5
+        column = 0
+        for i, edge in enumerate(column_edges):
+            if anchor >= edge:
+                column = i
+        cells[column].append(text)
+    return [" ".join(cell) for cell in cells]
+
+def geometry_money_value(cell):
+    cleaned = cell.replace("$", "").strip()
+    if cleaned.upper() == "NSP":
+        return "NSP"
+    if MONEY_PATTERN.fullmatch(cleaned):
+        return cleaned
+    return "N/A"
 
-                title_text = extract_multiline_title(lines, i, parsed_values)
-
-                item = {
-                    "CLIN": clin,
-                    "SLIN": slin,
-                    "Title": title_text,
-                    "Quantity": quantity,
-                    "Estimated Unit Price ($)": unit_price,
-                    "Unit": unit,
-                    "Amount ($)": amount,
-                    "Amount Committed ($)": extract_lineitem_amount_committed(match),
-                    "Amount Reserved ($)": extract_lineitem_amount_reserved(match),
-                    "Optional": extract_lineitem_optional(match),
-                    "Not to Exceed": extract_lineitem_not_to_exceed(match),
-                    "Description": extract_lineitem_description(match),
-                    "POP Start Date": extract_lineitem_pop_start_date(match),
-                    "POP End Date": extract_lineitem_pop_end_date(match),
-                    "Group": extract_lineitem_group(match),
-                    "Line Item Type": extract_lineitem_line_item_type(match),
-                    "NSP": extract_lineitem_nsp(match),
-                    "Place of Performance": extract_lineitem_place_of_performance(match)
-                }
-                line_items.append(item)
-                log_debug("Line Item Extracted from Text:")
-                for key, val in item.items():
-                    log_debug(f"  {key:30}: {val}")
-                log_debug("----------------------------------------")
+def build_geometry_item(row_text, cells, title_parts):
+    match = LINE_ITEM_PATTERN.match(row_text)
+    tokens = LineItemTokens(match)
+    clin, slin = extract_lineitem_clin_or_slin(tokens)
+    item_cell, supplies_cell, quantity_cell, unit_cell, unit_price_cell, amount_cell = cells
+
+    values = [
+        clin,
+        slin,
+        " ".join(title_parts).strip(),
+        quantity_cell if QUANTITY_PATTERN.fullmatch(quantity_cell) else "N/A",
+        geometry_money_value(unit_price_cell),
+        unit_cell if unit_cell in VALID_UNIT else "N/A",
+        geometry_money_value(amount_cell),
+    ]
+    for extractor in LINE_ITEM_FIELD_EXTRACTORS.values():
+        values.append(extractor(tokens))
+    return LineItem(values)
+
+def extract_schedule_items_by_geometry(page):
+    # Reads the schedule table by column position. Returns None when the page has no
+    # recognizable column header, so the caller can fall back to the text engine.
+    columns = find_schedule_columns(group_chars_into_lines(page.chars))
+    if columns is None:
+        return None
+    header_bottom, column_edges = columns
+
+    table = page.within_bbox((0, header_bottom, page.width, page.height))
+    line_items = []
+    open_row = None
+    title_parts = []
+    for line_chars in group_chars_into_lines(table.chars):
+        chunks = split_line_into_chunks(line_chars)
+        if not chunks:
+            continue
+        row_text = " ".join(text for _, _, text in chunks)
+        cells = assign_cells(chunks, column_edges)
+
+        match = LINE_ITEM_PATTERN.match(row_text)
+        if match and cells[0] != match.group(1):
+            # The row was not laid out in cells (e.g. typeset as one run of text), so column
+            # positions cannot be trusted on this page
+            return None
+        if match:
+            if open_row is not None:
+                line_items.append(build_geometry_item(*open_row, title_parts))
+            open_row = (row_text, cells)
+            title_parts = [cells[1]]
+        elif open_row is not None:
+            if row_text.startswith(TITLE_CUTOFF_PREFIXES) or "Continued ..." in row_text:
+                # The title is complete, so the item is emitted now and later rows are not appended
+                line_items.append(build_geometry_item(*open_row, title_parts))
+                open_row = None
+            else:
+                title_parts.append(cells[1])
+    if open_row is not None:
+        line_items.append(build_geometry_item(*open_row, title_parts))
 
+    if logger.isEnabledFor(logging.DEBUG):
+        for item in line_items:
+            logger.debug("Line Item Extracted from Geometry: %s", item)
     return line_items
 
+# -----------------------------
+# Page Text Cache
+# -----------------------------
+
+def text_extraction_settings_key():
+    settings = {
+        "pdfplumber": pdfplumber.__version__,
+        "extract_text": TEXT_EXTRACTION_SETTINGS,
+        # Screening also keeps pages that may continue a schedule; texts cached before that lack them
+        "screened": "continuations" if PAGE_SCREENING else False,
+        "tiered": TIERED_EXTRACTION,
+        "engine": LINE_ITEM_ENGINE,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+class PageTextCache:
+    # SQLite store of extracted page text keyed by PDF hash, page number and extraction settings.
+    # Whole documents are evicted least-recently-used first once the cache exceeds max_bytes.
+    # Each worker process opens its own connection; WAL mode lets them share the file.
+
+    def __init__(self, path, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.settings_key = text_extraction_settings_key()
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " pdf_hash TEXT, settings TEXT, page_count INTEGER, size INTEGER, last_used REAL,"
+                " PRIMARY KEY (pdf_hash, settings))"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " pdf_hash TEXT, settings TEXT, page_num INTEGER, text TEXT,"
+                " PRIMARY KEY (pdf_hash, settings, page_num))"
+            )
+
+    def get(self, pdf_hash):
+        key = (pdf_hash, self.settings_key)
+        row = self.connection.execute(
+            "SELECT page_count FROM documents WHERE pdf_hash = ? AND settings = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+
+        texts = [None] * row[0]
+        for page_num, text in self.connection.execute(
+            "SELECT page_num, text FROM pages WHERE pdf_hash = ? AND settings = ?", key
+        ):
+            texts[page_num - 1] = text
+        with self.connection:
+            self.connection.execute(
+                "UPDATE documents SET last_used = ? WHERE pdf_hash = ? AND settings = ?", (time.time(),) + key
+            )
+        return texts
+
+    def put(self, pdf_hash, texts):
+        key = (pdf_hash, self.settings_key)
+        size = sum(len(text) for text in texts if text)
+        with self.connection:
+            self.connection.execute("DELETE FROM pages WHERE pdf_hash = ? AND settings = ?", key)
+            self.connection.executemany(
+                "INSERT INTO pages VALUES (?, ?, ?, ?)",
+                [key + (page_num, text) for page_num, text in enumerate(texts, start=1)]
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)", key + (len(texts), size, time.time())
+            )
+            self._evict()
+
+    def _evict(self):
+        # Keep the most recently used documents whose combined size fits within max_bytes
+        evicted = self.connection.execute(
+            "SELECT pdf_hash, settings FROM ("
+            " SELECT pdf_hash, settings, SUM(size) OVER (ORDER BY last_used DESC) AS running_size"
+            " FROM documents) WHERE running_size > ?", (self.max_bytes,)
+        ).fetchall()
+        if evicted:
+            self.connection.executemany("DELETE FROM pages WHERE pdf_hash = ? AND settings = ?", evicted)
+            self.connection.executemany("DELETE FROM documents WHERE pdf_hash = ? AND settings = ?", evicted)
+            logger.info("Evicted %d documents from the page cache", len(evicted))
+
+# One connection per process, opened on first use
+_page_caches = {}
+
+def get_page_cache(path):
+    if path not in _page_caches:
+        _page_caches[path] = PageTextCache(path)
+    return _page_caches[path]
+
+# -----------------------------
+# Page Parse Memo
+# -----------------------------
+
+class PageParseMemo:
+    # Parse results keyed by a hash of the page text. The in-memory tier is an LRU of max_entries;
+    # the optional SQLite tier at path outlives the process and is shared by workers, and drops
+    # its oldest entries once it holds more than PARSE_MEMO_DISK_MAX_ENTRIES.
+
+    def __init__(self, max_entries=PARSE_MEMO_ENTRIES, path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.connection = None
+        if path:
+            self.connection = sqlite3.connect(path, timeout=60)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            with self.connection:
+                self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT)")
+
+    def get(self, key, decode=None):
+        # decode rebuilds values read from the SQLite tier, which come back as plain JSON types
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            return value
+        if self.connection is not None:
+            row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                if decode is not None:
+                    value = decode(value)
+                self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.connection is not None:
+            with self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?)", (key, json.dumps(value)))
+                self.connection.execute(
+                    "DELETE FROM results WHERE rowid <= (SELECT MAX(rowid) FROM results) - ?",
+                    (PARSE_MEMO_DISK_MAX_ENTRIES,)
+                )
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+# One memo per process, created on first use
+_page_memo = None
+
+def get_page_memo():
+    global _page_memo
+    if _page_memo is None:
+        _page_memo = PageParseMemo(PARSE_MEMO_ENTRIES, PARSE_MEMO_PATH)
+    return _page_memo
+
+def page_memo_key(kind, text):
+    # The parser version is part of the key so results from older parsing code are never reused
+    return hashlib.sha256(f"{EXTRACTOR_VERSION}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+def memoized_page_parse(kind, parse, text, decode=None):
+    # Returns parse(text), computing it only for page texts the memo has not seen
+    if not PARSE_MEMO_ENTRIES:
+        return parse(text)
+    key = page_memo_key(kind, text)
+    memo = get_page_memo()
+    result = memo.get(key, decode)
+    if result is None:
+        result = parse(text)
+        memo.put(key, result)
+    return result
+
+def decode_schedule_page(value):
+    # (capture continues, line items) as memoized by ScheduleParser.feed_page
+    capture, line_items = value
+    return capture, decode_line_items(line_items)
+
+# -----------------------------
+# Page Screening
+# -----------------------------
+
+def read_pdfium_page_texts(pdf_path, pdf_input=None):
+    # pdfium's raw character stream for every page, in content order. Raises on unreadable PDFs.
+    # pdfium cannot read from a memory map, so mapped files are opened by path instead.
+    if pdf_input is None or isinstance(pdf_input, mmap.mmap):
+        pdf = pypdfium2.PdfDocument(pdf_path)
+    else:
+        pdf = pypdfium2.PdfDocument(rewind(pdf_input))
+    texts = []
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return texts
+
+def schedule_continues(text, capturing=False):
+    # A rough pass of ScheduleParser over raw text: whether the page ends with the schedule still
+    # capturing, because an item's title is open or the last schedule line says "Continued ...".
+    # capturing says the previous page ended that way, so this page may carry on its schedule.
+    capture = open_item = capturing
+    continued = False
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if is_schedule_header(line):
+            capture = True
+        elif capture and stripped:
+            if stripped.startswith(TITLE_CUTOFF_PREFIXES):
+                open_item = False
+            elif LINE_ITEM_PATTERN.match(stripped):
+                open_item = True
+            continued = "Continued ..." in line
+    return capture and (open_item or continued)
+
+def screen_pdf_pages(pdf_path, pdf_input=None, page_texts=None):
+    # Finds candidate pages from pdfium's raw character stream, which is far cheaper than the
+    # layout-aware extract_text pass. Returns None when every page should be extracted.
+    # pdf_input is the already opened source from open_pdf_source, when the caller has one;
+    # page_texts is the character stream when the fast extraction tier has already read it.
+    if not PAGE_SCREENING or pypdfium2 is None:
+        return None
+
+    if page_texts is None:
+        try:
+            page_texts = read_pdfium_page_texts(pdf_path, pdf_input)
+        except Exception as e:
+            logger.warning("Page screening failed for %s, extracting every page: %s", pdf_path, e)
+            return None
+
+    candidates = set()
+    follows_schedule = False
+    for page_num, text in enumerate(page_texts, start=1):
+        flattened = " ".join(text.split()).upper()
+        if any(marker in flattened for marker in PAGE_SCREEN_MARKERS):
+            candidates.add(page_num)
+            follows_schedule = schedule_continues(text, follows_schedule)
+        elif follows_schedule and continues_schedule(text.split("\n"), True):
+            # Continuation pages need not repeat the table header, so they carry no marker
+            candidates.add(page_num)
+            follows_schedule = schedule_continues(text, True)
+        else:
+            follows_schedule = False
+
+    if not candidates:
+        logger.info("Page screening found no markers in %s, extracting every page", pdf_path)
+        return None
+    logger.debug("Page screening selected pages %s of %s", sorted(candidates), pdf_path)
+    return candidates
+
+# -----------------------------
+# Tiered Text Extraction
+# -----------------------------
+
+# Characters pdfium emits for glyphs it could not map to text
+UNMAPPED_CHARACTERS = ("\ufffd", "\ufffe", "\x02")
+def read_fast_page_texts(pdf_path, pdf_input=None):
+    # The fast tier: every page's text straight from pdfium's character stream, with pdfium's
+    # line breaks normalized to match extract_text. None when pdfium is missing or fails.
+    if pypdfium2 is None:
+        return None
+    try:
+        return [text.replace("\r\n", "\n").replace("\r", "\n")
+                for text in read_pdfium_page_texts(pdf_path, pdf_input)]
+    except Exception as e:
+        logger.warning("Fast text extraction failed for %s, using layout extraction: %s", pdf_path, e)
+        return None
+
+BARE_CODE_PATTERN = re.compile(r"^\d{4}[A-Z]{0,2}$")
+
+def fast_text_passes(text):
+    # Whether a page's fast text can stand in for the layout pass. The character stream follows
+    # content order rather than reading order, so the page is kept only when everything the
+    # parsers anchor on reads cleanly: each marker sits on one line, the PR number follows its
+    # label, every CLIN/SLIN line carries a quantity and unit unless it is not separately priced,
+    # and a schedule header is followed by at least one such line. A code standing alone on its
+    # line means the table was drawn column by column, which only the layout pass reassembles.
+    if any(char in text for char in UNMAPPED_CHARACTERS):
+        return False
+
+    lines = [line.strip() for line in text.split("\n")]
+    flattened = " ".join(text.split()).upper()
+    upper_lines = [line.upper() for line in lines]
+    for marker in PAGE_SCREEN_MARKERS:
+        if marker in flattened and not any(marker in line for line in upper_lines):
+            return False
+
+    # Line items above a schedule header are never parsed, so only the lines below it are checked
+    header_index = next((i for i, line in enumerate(lines) if is_schedule_header(line)), -1)
+    line_item_found = False
+    for i, line in enumerate(lines):
+        if "REQUISITION NUMBER" in upper_lines[i]:
+            if not any(PR_NUMBER_PATTERN.search(candidate) for candidate in lines[i + 1:i + 4]):
+                return False
+        if i <= header_index:
+            continue
+        if BARE_CODE_PATTERN.match(line):
+            return False
+        match = LINE_ITEM_PATTERN.match(line)
+        if match:
+            tokens = LineItemTokens(match)
+            if tokens.quantity_index is None and tokens.amount != "NSP":
+                return False
+            line_item_found = True
+    return header_index < 0 or line_item_found
+
 # -----------------------------
 # PDF Processing Pipeline
 # -----------------------------
 
-def extract_pdf_text(pdf_path):
-    extracted_data = []
+def extract_page_text(page):
+    # The geometry engine reads line items from character positions, so the text it still needs
+    # for header fields comes from the cheap simple extraction instead of the layout pass
+    if LINE_ITEM_ENGINE == "geometry":
+        return page.extract_text_simple()
+    return page.extract_text(**TEXT_EXTRACTION_SETTINGS)
+
+# Page artifacts the pipeline knows how to produce
+PAGE_ARTIFACT_PRODUCERS = {
+    "text": extract_page_text,
+    "table": lambda page: page.extract_table(),
+    "schedule_items": extract_schedule_items_by_geometry,
+}
 
-    with pdfplumber.open(pdf_path) as pdf:
+def required_page_artifacts():
+    # Text feeds TEXT_FIELD_EXTRACTORS and the text line item parser; tables only matter
+    # when a table-backed extractor has been registered
+    artifacts = {"text"}
+    if TABLE_FIELD_EXTRACTORS:
+        artifacts.add("table")
+    if LINE_ITEM_ENGINE == "geometry":
+        artifacts.add("schedule_items")
+    return artifacts
+
+def produce_page_artifact(artifact, page, page_num):
+    if _timings is None:
+        return PAGE_ARTIFACT_PRODUCERS[artifact](page)
+    start = time.perf_counter()
+    try:
+        return PAGE_ARTIFACT_PRODUCERS[artifact](page)
+    finally:
+        _timings.add_page_stage("extract_" + artifact, page_num, time.perf_counter() - start)
+
+def release_page(pdf, page):
+    # Drop the page's chars/layout objects and the parsed PDF objects behind them, so memory
+    # holds only the page being processed rather than every page read so far
+    if hasattr(page, "close"):
+        page.close()
+    else:
+        page.flush_cache()
+    cached_objs = getattr(pdf.doc, "_cached_objs", None)
+    if cached_objs is not None:
+        cached_objs.clear()
+
+def iter_pdf_pages(pdf_path, page_cache=None, artifacts=None):
+    # Yields ("text", text) and ("table", rows) entries one page at a time. When the geometry
+    # engine reads a page's line items, they are yielded as ("schedule_items", items) and that
+    # page's text as ("header_text", text), which feeds only the header fields. Pages skipped by
+    # screening or without text are yielded as ("page_break", None) so parsing state can close.
+    # Archive members are read once and shared by hashing, screening and pdfplumber.
+    with open_pdf_source(pdf_path) as pdf_input:
+        yield from iter_source_pages(pdf_path, pdf_input, page_cache, artifacts)
+
+def iter_source_pages(pdf_path, pdf_input, page_cache=None, artifacts=None):
+    if artifacts is None:
+        artifacts = required_page_artifacts()
+
+    cached_texts = None
+    if page_cache is not None and "text" in artifacts:
+        pdf_hash = hash_file(pdf_input)
+        cached_texts = page_cache.get(pdf_hash)
+        if cached_texts is not None and artifacts == {"text"}:
+            logger.debug("Page text for %s served from cache", pdf_path)
+            if isinstance(_timings, DocumentTimings):
+                _timings.page_count = len(cached_texts)
+            count_page_tier("cache", sum(1 for text in cached_texts if text))
+            for text in cached_texts:
+                yield ("text", text) if text else ("page_break", None)
+            return
+
+    text_pages = fast_texts = None
+    if "text" in artifacts and cached_texts is None:
+        if TIERED_EXTRACTION:
+            fast_texts = timed_call("read_fast_page_texts", read_fast_page_texts, pdf_path, pdf_input)
+        text_pages = timed_call("screen_pdf_pages", screen_pdf_pages, pdf_path, pdf_input, fast_texts)
+
+    page_texts = []
+    pdf = timed_call("open", pdfplumber.open, rewind(pdf_input))
+    with pdf:
+        if isinstance(_timings, DocumentTimings):
+            _timings.page_count = len(pdf.pages)
         for page_num, page in enumerate(pdf.pages, start=1):
-            log_debug(f"========== PAGE {page_num} ==========")
-            text = page.extract_text()
-            tables = page.extract_table()
-
-            log_debug("Text Content:")
-            log_debug(text if text else "[No text extracted]")
-            log_debug("\nTable Content:")
-            if tables:
-                for t_row in tables:
-                    log_debug(f"  {t_row}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("========== PAGE %d ==========", page_num)
+
+            text = tables = schedule_items = None
+            fast_text = fast_texts[page_num - 1] if fast_texts and page_num <= len(fast_texts) else None
+            if "text" in artifacts:
+                if cached_texts is not None:
+                    text = cached_texts[page_num - 1]
+                    if text:
+                        count_page_tier("cache")
+                elif text_pages is not None and page_num not in text_pages:
+                    text = None
+                elif fast_text is not None and timed_call("fast_text_passes", fast_text_passes, fast_text):
+                    text = fast_text
+                    count_page_tier("fast")
+                else:
+                    # Pages the fast tier cannot vouch for escalate to the layout-aware pass
+                    text = produce_page_artifact("text", page, page_num)
+                    count_page_tier("layout")
+                page_texts.append(text)
+                if debug:
+                    logger.debug("Text Content:")
+                    logger.debug("%s", text if text else "[No text extracted]")
+
+            if "table" in artifacts:
+                tables = produce_page_artifact("table", page, page_num)
+                if debug:
+                    logger.debug("Table Content:")
+                    if tables:
+                        for t_row in tables:
+                            logger.debug("  %s", t_row)
+                    else:
+                        logger.debug("  [No table extracted]")
+
+            if "schedule_items" in artifacts and (text_pages is None or page_num in text_pages):
+                schedule_items = produce_page_artifact("schedule_items", page, page_num)
+
+            release_page(pdf, page)
+
+            if schedule_items is not None:
+                yield ("schedule_items", schedule_items)
+                if text:
+                    yield ("header_text", text)
+            elif text:
+                yield ("text", text)
             else:
-                log_debug("  [No table extracted]")
-
-            if text:
-                extracted_data.append(("text", text))
+                yield ("page_break", None)
             if tables:
-                extracted_data.append(("table", tables))
+                yield ("table", tables)
+
+    if page_cache is not None and "text" in artifacts and cached_texts is None:
+        page_cache.put(pdf_hash, page_texts)
 
-    return extracted_data
+def extract_pdf_text(pdf_path, page_cache=None, artifacts=None):
+    return list(iter_pdf_pages(pdf_path, page_cache, artifacts))
 
 def parse_pdf_data(extracted_data):
+    # extracted_data may be a list or the page-at-a-time generator from iter_pdf_pages
     structured_data = {col: "" for col in COLUMNS}
     line_items = []
+    header_fields = DocumentFieldResolver()
+    schedule = ScheduleParser()
 
     for data_type, content in extracted_data:
         if data_type == "text":
-            structured_data.update(parse_text_content(content))
-            line_items.extend(parse_line_items_from_text(content))
-
+            if not header_fields.done:
+                timed_call("parse_text_content", header_fields.feed, content)
+            line_items.extend(timed_call("parse_line_items_from_text", schedule.feed_page, content))
+        elif data_type == "header_text":
+            if not header_fields.done:
+                timed_call("parse_text_content", header_fields.feed, content)
+        elif data_type == "schedule_items":
+            # Items the text parser still has open come first; the geometry page starts afresh
+            line_items.extend(schedule.finish())
+            line_items.extend(content)
+        elif data_type == "page_break":
+            line_items.extend(schedule.finish())
+        elif data_type == "table":
+            structured_data.update(timed_call("parse_table_content", parse_table_content, content))
+
+    line_items.extend(schedule.finish())
+    structured_data.update(header_fields.result())
     return structured_data, line_items
 
-def reset_output_file():
-    if os.path.exists(OUTPUT_CSV):
-        os.remove(OUTPUT_CSV)
-
-# Update write_to_csv to handle multiple files and prepend file name to each row
-def write_to_csv(all_data):
-    reset_output_file()
-
-    with open(OUTPUT_CSV, mode='w', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=COLUMNS)
-        writer.writeheader()
-        for data in all_data:
-            for item in data['line_items']:
-                row = {col: "" for col in COLUMNS}
-                row.update(data['structured_data'])
-                row.update(item)
-                row["Source File"] = data['source_file']
+# -----------------------------
+# Batch Processing
+# -----------------------------
+
+def list_pdf_files(folder):
+    # Sorted so the output order never depends on the filesystem or the worker count
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(".pdf"))
+
+def parse_pdf_file(pdf_path, page_cache_path=None):
+    # Returns (structured_data, line_items, document timings or None, pages per tier or None)
+    global _timings, _document_tiers
+
+    page_cache = get_page_cache(page_cache_path) if page_cache_path else None
+    outer_tiers, _document_tiers = _document_tiers, {} if TIERED_EXTRACTION else None
+    try:
+        if not PROFILING:
+            return parse_pdf_data(iter_pdf_pages(pdf_path, page_cache)) + (None, _document_tiers)
+
+        document_timings = DocumentTimings(get_filename_from_path(pdf_path))
+        outer_timings, _timings = _timings, document_timings
+        start = time.perf_counter()
+        try:
+            structured_data, line_items = parse_pdf_data(iter_pdf_pages(pdf_path, page_cache))
+        finally:
+            _timings = outer_timings
+        document_timings.seconds = time.perf_counter() - start
+        document_timings.line_item_count = len(line_items)
+        return structured_data, line_items, document_timings, _document_tiers
+    finally:
+        _document_tiers = outer_tiers
+
+class DocumentTimeout(BaseException):
+    # Not an Exception, so the handlers that let one page or one extractor fail and carry on
+    # cannot swallow it; process_pdf_file catches it by name
+    pass
+
+def _raise_document_timeout(signum, frame):
+    raise DocumentTimeout(f"exceeded the {DOCUMENT_TIMEOUT} second time budget")
+
+def failed_result(error_type, message, seconds):
+    error = {"error": error_type, "message": message, "seconds": round(seconds, 3)}
+    return {col: "" for col in COLUMNS}, [], None, None, error
+
+def process_pdf_file(pdf_path, page_cache_path=None):
+    # Returns (structured_data, line_items, document timings or None, pages per tier or None,
+    # error or None).
+    # Any failure, including running over DOCUMENT_TIMEOUT, is returned as an error instead of raised.
+    start = time.perf_counter()
+    use_alarm = (
+        DOCUMENT_TIMEOUT and hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+    previous_handler = None
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_document_timeout)
+        signal.setitimer(signal.ITIMER_REAL, DOCUMENT_TIMEOUT)
+
+    try:
+        try:
+            structured_data, line_items, document_timings, tier_pages = parse_pdf_file(pdf_path, page_cache_path)
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except (Exception, DocumentTimeout) as e:
+        logger.error("Failed to process %s: %s: %s", pdf_path, type(e).__name__, e)
+        return failed_result(type(e).__name__, str(e), time.perf_counter() - start)
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    return structured_data, line_items, document_timings, tier_pages, None
+
+def collect_result(result):
+    structured_data, line_items, document_timings, tier_pages, error = result
+    if document_timings is not None and isinstance(_timings, BatchTimings):
+        _timings.add_document(document_timings)
+    if tier_pages and _batch_tiers is not None:
+        for tier, pages in tier_pages.items():
+            _batch_tiers[tier] = _batch_tiers.get(tier, 0) + pages
+    return structured_data, line_items, error
+
+def apply_memory_limit():
+    # Caps the address space of a worker process so a runaway document raises MemoryError
+    # inside that worker instead of dragging the host into swap or the OOM killer
+    if DOCUMENT_MEMORY_LIMIT_MB and resource is not None:
+        limit = DOCUMENT_MEMORY_LIMIT_MB * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def init_worker(log_queue, log_level, settings):
+    globals().update(settings)
+    if log_queue is not None:
+        configure_worker_logging(log_queue, log_level)
+    apply_memory_limit()
+
+class WorkerPool:
+    # Worker processes that can outlive one batch, so a long-running caller such as the folder
+    # watcher forks them once. A worker killed outright breaks the whole pool; restart() swaps
+    # in a fresh one.
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.settings = {name: globals()[name] for name in WORKER_SETTINGS}
+        self.executor = self._start()
+
+    def _start(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                   initargs=(_log_queue, logger.level, self.settings))
+
+    def restart(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._start()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def iter_batch_results(pdf_paths, workers=NUM_WORKERS, page_cache_path=None, pool=None):
+    # Yields (structured_data, line_items, error or None) in the order of pdf_paths.
+    # A memory limit only ever applies to worker processes, so it forces the pool even for one worker.
+    # With pool, documents go to those workers and the pool is left running afterwards.
+    if pool is None and workers <= 1 and not DOCUMENT_MEMORY_LIMIT_MB:
+        for pdf_path, loaded in iter_read_ahead(pdf_paths, load_pdf_input):
+            if loaded is not None:
+                _loaded_inputs[pdf_path] = loaded
+            try:
+                result = process_pdf_file(pdf_path, page_cache_path)
+            finally:
+                # Left behind when the document failed before its input was opened
+                unused = _loaded_inputs.pop(pdf_path, None)
+                if unused is not None:
+                    unused.close()
+            yield collect_result(result)
+        return
+
+    def retry_alone(pdf_path):
+        # Run one document in a pool of its own to tell whether it is what killed the worker
+        start = time.perf_counter()
+        with WorkerPool(1) as alone:
+            try:
+                return alone.executor.submit(process_pdf_file, pdf_path, page_cache_path).result()
+            except BrokenProcessPool:
+                logger.error("Worker process died while processing %s", pdf_path)
+                return failed_result("WorkerCrashed", "worker process died", time.perf_counter() - start)
+
+    owned = pool is None
+    if owned:
+        pool = WorkerPool(workers)
+    workers = pool.workers
+    # Keep a bounded window of submitted documents and hand results back in
+    # submission order, so a single writer sees the same sequence as a serial run
+    pending = deque()
+    # Files are read through ahead of submission, so workers open them from the page cache
+    read_ahead = iter_read_ahead(pdf_paths, warm_pdf_input)
+    remaining = (pdf_path for pdf_path, _ in read_ahead)
+    try:
+        while True:
+            while len(pending) < workers * 2:
+                pdf_path = next(remaining, None)
+                if pdf_path is None:
+                    break
+                pending.append((pdf_path, pool.executor.submit(process_pdf_file, pdf_path, page_cache_path)))
+            if not pending:
+                break
+
+            pdf_path, future = pending.popleft()
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # A worker was killed outright (e.g. by the OOM killer or a crash in native code),
+                # which fails every outstanding future. Isolate this document, then resubmit the rest.
+                pool.restart()
+                result = retry_alone(pdf_path)
+                pending = deque(
+                    (path, pool.executor.submit(process_pdf_file, path, page_cache_path)) for path, _ in pending
+                )
+            yield collect_result(result)
+    finally:
+        read_ahead.close()
+        if owned:
+            pool.close()
+        else:
+            for _, future in pending:
+                future.cancel()
+
+class ErrorReport:
+    # Sidecar CSV listing every document that failed or ran over its budget.
+    # Created on the first failure so a clean run leaves no report behind.
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.count = 0
+        if os.path.exists(path):
+            os.remove(path)
+
+    def record(self, source_file, error):
+        if self.file is None:
+            self.file = open(self.path, mode='w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["Source File", "Error", "Message", "Seconds"])
+        self.writer.writerow([source_file, error["error"], error["message"], error["seconds"]])
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# -----------------------------
+# Incremental Manifest
+# -----------------------------
+
+def manifest_version():
+    # Results depend on the line item engine and extraction tiering as well as the parser code,
+    # so an entry is only reused under the same text extraction settings
+    return f"{EXTRACTOR_VERSION}:{text_extraction_settings_key()}"
+
+class Manifest:
+    # Append-only JSON lines file mapping (manifest version, PDF content hash) to parse results.
+    # Only byte offsets and duplicate-detection fingerprints are kept in memory; entries are read
+    # back on demand.
+
+    def __init__(self, path):
+        self.path = path
+        self.version = manifest_version()
+        self.offsets = {}
+        self.fingerprints = {}
+
+        if os.path.exists(path):
+            self._load()
+        self.file = open(path, "ab")
+
+    def _load(self):
+        line_count = 0
+        with open(self.path, "rb") as file:
+            offset = 0
+            for line in file:
+                line_count += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted run
+                    entry = None
+                if entry is not None and entry["version"] == self.version:
+                    self.offsets[entry["hash"]] = offset
+                    if (entry.get("fingerprint") or "").startswith(FINGERPRINT_PREFIXES):
+                        self.fingerprints[entry["hash"]] = entry["fingerprint"]
+                offset += len(line)
+
+        # Drop superseded, damaged and other-version entries so the file doesn't grow forever
+        if len(self.offsets) < line_count:
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        offsets = {}
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+            for file_hash, offset in self.offsets.items():
+                src.seek(offset)
+                offsets[file_hash] = dst.tell()
+                dst.write(src.readline())
+        os.replace(tmp_path, self.path)
+        self.offsets = offsets
+        logger.info("Compacted %s to %d entries", self.path, len(offsets))
+
+    def __contains__(self, file_hash):
+        return file_hash in self.offsets
+
+    def get(self, file_hash):
+        offset = self.offsets.get(file_hash)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            entry = json.loads(file.readline())
+        return entry["structured_data"], decode_line_items(entry["line_items"])
+
+    def add(self, file_hash, source_file, structured_data, line_items, fingerprint=None):
+        entry = {
+            "version": self.version,
+            "hash": file_hash,
+            "source_file": source_file,
+            "structured_data": structured_data,
+            "line_items": line_items,
+            "fingerprint": fingerprint,
+        }
+        self.offsets[file_hash] = self.file.tell()
+        if fingerprint:
+            self.fingerprints[file_hash] = fingerprint
+        self.file.write(json.dumps(entry).encode("utf-8") + b"\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def iter_incremental_results(pdf_paths, manifest, workers=NUM_WORKERS, page_cache_path=None,
+                             file_hashes=None, fingerprints=None, pool=None):
+    # Unchanged PDFs are served from the manifest; only new or changed ones are extracted.
+    # Results come back in the order of pdf_paths either way. file_hashes and fingerprints are
+    # passed in when duplicate detection has already computed them.
+    if file_hashes is None:
+        file_hashes = [hash_file(pdf_path) for pdf_path in pdf_paths]
+    if fingerprints is None:
+        fingerprints = {}
+    needs_extraction = [file_hash not in manifest for file_hash in file_hashes]
+    changed_paths = [pdf_path for pdf_path, needed in zip(pdf_paths, needs_extraction) if needed]
+    logger.info("Incremental run: %d of %d PDFs need extraction", len(changed_paths), len(pdf_paths))
+
+    fresh_results = iter_batch_results(changed_paths, workers, page_cache_path, pool)
+    for pdf_path, file_hash, needed in zip(pdf_paths, file_hashes, needs_extraction):
+        if not needed:
+            yield manifest.get(file_hash) + (None,)
+            continue
+
+        structured_data, line_items, error = next(fresh_results)
+        # Failed documents are left out of the manifest so the next run tries them again
+        if error is None:
+            manifest.add(file_hash, get_filename_from_path(pdf_path), structured_data, line_items,
+                         fingerprints.get(file_hash))
+        yield structured_data, line_items, error
+
+# -----------------------------
+# Duplicate Detection
+# -----------------------------
+
+def pdf_object_digest(obj, digests):
+    # Content digest of a PDF object and everything it references, independent of object numbers.
+    # digests caches referenced objects by number, so shared fonts and images are hashed once;
+    # an object met again while it is still being hashed (a reference cycle) hashes as a marker.
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in digests:
+            return digests[obj.objid] or b"cycle"
+        digests[obj.objid] = None
+        digest = pdf_object_digest(obj.resolve(), digests)
+        digests[obj.objid] = digest
+        return digest
+
+    digest = hashlib.sha256()
+    if isinstance(obj, PDFStream):
+        digest.update(b"stream")
+        digest.update(pdf_object_digest(obj.attrs, digests))
+        # Image data, form content and embedded fonts all live in stream data
+        digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        digest.update(b"dict")
+        for key in sorted(obj, key=str):
+            # Lengths describe the encoded bytes, which a re-save may compress differently
+            if str(key) in ("Length", "Filter", "DecodeParms"):
+                continue
+            digest.update(str(key).encode("utf-8") + b"\x00")
+            digest.update(pdf_object_digest(obj[key], digests))
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"list")
+        for item in obj:
+            digest.update(pdf_object_digest(item, digests))
+    else:
+        digest.update(repr(obj).encode("utf-8", "backslashreplace"))
+    return digest.digest()
+
+def content_stream_hash(pdf_path):
+    # Hash of every page's decoded content streams and the resources they draw from, including
+    # the image data and form content of XObjects, so scanned and form-generated pages that are
+    # all "/Im0 Do" still hash apart. Copies that differ only in metadata, such as a re-saved file
+    # with a new producer or modification date, hash the same.
+    # No layout analysis runs, so this is cheap next to text extraction.
+    digest = hashlib.sha256()
+    digests = {}
+    with open_pdf_source(pdf_path) as pdf_input, pdfplumber.open(pdf_input) as pdf:
+        for page in pdf.pages:
+            streams = page.page_obj.contents or []
+            for stream in streams:
+                digest.update(resolve1(stream).get_data())
+            digest.update(b"\x00resources")
+            digest.update(pdf_object_digest(page.page_obj.resources, digests))
+            digest.update(b"\x00page")
+    return digest.hexdigest()
+
+# Fingerprints are tagged with how they were made. Manifest entries carrying any other tag were
+# fingerprinted by older code, which hashed page contents without their resources.
+CONTENT_FINGERPRINT_PREFIX = "content+resources:"
+FINGERPRINT_PREFIXES = (CONTENT_FINGERPRINT_PREFIX, "file:")
+
+def document_fingerprint(pdf_path):
+    try:
+        return CONTENT_FINGERPRINT_PREFIX + content_stream_hash(pdf_path)
+    except Exception as e:
+        logger.warning("Could not hash content streams of %s, falling back to the file hash: %s", pdf_path, e)
+        return "file:" + hash_file(pdf_path)
+
+def find_duplicates(pdf_paths, workers=NUM_WORKERS, file_hashes=None, fingerprints=None, pool=None):
+    # Returns, for each path, the index of the earlier path it duplicates, or None for the first copy.
+    # The file hash spots byte-identical copies without parsing them; only files with new bytes
+    # get their content streams hashed. fingerprints maps file hashes to fingerprints that are
+    # already known, such as those in the manifest, and gains every fingerprint computed here.
+    if file_hashes is None:
+        file_hashes = [hash_file(pdf_path) for pdf_path in pdf_paths]
+    if fingerprints is None:
+        fingerprints = {}
+    first_by_file_hash = {}
+    for index, file_hash in enumerate(file_hashes):
+        first_by_file_hash.setdefault(file_hash, index)
+    distinct = [index for index in sorted(first_by_file_hash.values()) if file_hashes[index] not in fingerprints]
+    distinct_paths = [pdf_paths[index] for index in distinct]
+
+    if pool is not None and len(distinct_paths) > 1:
+        computed = list(pool.executor.map(document_fingerprint, distinct_paths, chunksize=16))
+    elif workers > 1 and len(distinct_paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            computed = list(executor.map(document_fingerprint, distinct_paths, chunksize=16))
+    else:
+        computed = [document_fingerprint(pdf_path) for pdf_path in distinct_paths]
+    fingerprints.update((file_hashes[index], fingerprint) for index, fingerprint in zip(distinct, computed))
+
+    first_by_fingerprint = {}
+    original_of = []
+    for index, file_hash in enumerate(file_hashes):
+        fingerprint = fingerprints[file_hash]
+        original = first_by_fingerprint.setdefault(fingerprint, index)
+        original_of.append(None if original == index else original)
+    return original_of
+
+def iter_with_duplicates(source_files, original_of, unique_results):
+    # Expands results for the unique documents back to every input, in input order.
+    # A first copy's result is held only until its last duplicate has been emitted.
+    copies_left = {}
+    for original in original_of:
+        if original is not None:
+            copies_left[original] = copies_left.get(original, 0) + 1
+
+    held = {}
+    for index, original in enumerate(original_of):
+        if original is None:
+            result = next(unique_results)
+            if index in copies_left:
+                held[index] = result
+            yield result
+            continue
+
+        structured_data, line_items, error = held[original]
+        copies_left[original] -= 1
+        if not copies_left[original]:
+            del held[original]
+        logger.info("%s duplicates %s; reusing its results", source_files[index], source_files[original])
+        yield dict(structured_data, **{"Duplicate Of": source_files[original]}), line_items, error
+
+# -----------------------------
+# Output Sinks
+# -----------------------------
+
+def build_rows(source_file, structured_data, line_items):
+    # The row stream every sink consumes: one tuple per line item, in COLUMNS order. The
+    # document-level values are gathered once and shared by every row of the document.
+    document = dict(structured_data, **{"Source File": source_file})
+    prefix = tuple(document.get(col, "") for col in DOCUMENT_PREFIX_COLUMNS)
+    suffix = tuple(document.get(col, "") for col in DOCUMENT_SUFFIX_COLUMNS)
+    for item in line_items:
+        yield prefix + item + suffix
+
+MONEY_COLUMNS = ("Estimated Unit Price ($)", "Amount ($)", "Amount Committed ($)", "Amount Reserved ($)")
+DATE_COLUMNS = ("POP Start Date", "POP End Date")
+CENTS = Decimal("0.01")
+
+def parse_money(value):
+    try:
+        return Decimal(value.replace(",", "").replace("$", "")).quantize(CENTS)
+    except InvalidOperation:
+        # "N/A", "NSP" and blanks have no numeric value
+        return None
+
+def parse_quantity(value):
+    return int(value) if value.isdigit() else None
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%m/%d/%Y").date()
+    except ValueError:
+        return None
+
+TYPED_COLUMN_PARSERS = {
+    **{col: parse_money for col in MONEY_COLUMNS},
+    "Quantity": parse_quantity,
+    **{col: parse_date for col in DATE_COLUMNS},
+}
+_ROW_PARSERS = [TYPED_COLUMN_PARSERS.get(col) for col in COLUMNS]
+
+def typed_row(row):
+    return [parser(value) if parser else value for parser, value in zip(_ROW_PARSERS, row)]
+
+class OutputSink:
+    # Base for everything that consumes the row stream. Subclasses implement write_rows and close.
+    stage = "write"
+
+    def write_document(self, source_file, structured_data, line_items):
+        self.write_rows(list(build_rows(source_file, structured_data, line_items)))
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_completed_rows(path):
+    # Returns the rows of every document that was fully written by a previous run.
+    # The last document in the file may have been cut short by a crash, so its rows are dropped
+    # and it is processed again.
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return []
+        if header != COLUMNS:
+            raise ValueError(f"Cannot resume {path}: its header does not match the current columns")
+        rows = []
+        try:
+            for row in reader:
+                rows.append(row)
+        except csv.Error as e:
+            logger.warning("Stopped reading %s at a damaged row: %s", path, e)
+
+    if not rows:
+        return []
+    last_source = rows[-1][0]
+    while rows and rows[-1][0] == last_source:
+        rows.pop()
+    return rows
+
+class CsvStreamWriter(OutputSink):
+    # Appends each document's rows to the CSV as soon as it is parsed and flushes them to disk,
+    # so an interrupted run leaves a valid file that --resume can pick up from
+    stage = "csv_write"
+    header = COLUMNS
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.completed_files = set()
+
+        kept_rows = []
+        if resume and os.path.exists(path):
+            kept_rows = read_completed_rows(path)
+            self.completed_files = {row[0] for row in kept_rows}
+
+        # Rewrite through a temp file so the output is never left without a header
+        tmp_path = path + ".tmp"
+        with open(tmp_path, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.header)
+            writer.writerows(kept_rows)
+        os.replace(tmp_path, path)
+
+        self.file = open(path, mode='a', newline='')
+
+    def write_rows(self, rows):
+        with stage_timer(self.stage):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
                 writer.writerow(row)
-                log_debug(f"CSV Row Written: {row}")
+                logger.debug("CSV Row Written: %s", row)
+
+            # One write per document keeps a crash from interleaving two documents' rows
+            self.file.write(buffer.getvalue())
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def remove_documents(self, source_files):
+        # Drops earlier rows for documents that are about to be written again
+        source_files = set(source_files)
+        self.file.close()
+        tmp_path = self.path + ".tmp"
+        with open(self.path, newline='') as src, open(tmp_path, mode='w', newline='') as dst:
+            writer = csv.writer(dst)
+            for row in csv.reader(src):
+                if row[0] not in source_files:
+                    writer.writerow(row)
+        os.replace(tmp_path, self.path)
+        self.completed_files -= source_files
+        self.file = open(self.path, mode='a', newline='')
+
+    def close(self):
+        self.file.close()
+
+class ShardCsvWriter(CsvStreamWriter):
+    # Partial output of one shard. Each row starts with its document's position in the full input,
+    # which merge_shard_outputs uses to restore the single-node order. Rows go to a .partial file
+    # that is renamed into place only once the shard has finished.
+    header = ["Source Index"] + COLUMNS
+
+    def __init__(self, path, source_index):
+        self.final_path = path
+        self.source_index = source_index
+        super().__init__(path + ".partial")
+
+    def write_rows(self, rows):
+        super().write_rows([(self.source_index[row[0]],) + row for row in rows])
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is None:
+            os.replace(self.path, self.final_path)
+
+def import_pyarrow():
+    global pyarrow
+    if pyarrow is None:
+        try:
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet/Arrow output requires the pyarrow package") from None
+
+def arrow_schema():
+    fields = []
+    for col in COLUMNS:
+        if col in MONEY_COLUMNS:
+            arrow_type = pyarrow.decimal128(18, 2)
+        elif col == "Quantity":
+            arrow_type = pyarrow.int64()
+        elif col in DATE_COLUMNS:
+            arrow_type = pyarrow.date32()
+        else:
+            arrow_type = pyarrow.string()
+        fields.append(pyarrow.field(col, arrow_type))
+    return pyarrow.schema(fields)
+
+class ArrowSink(OutputSink):
+    # Typed columnar output: decimal amounts, integer quantities and dates for the POP columns.
+    # Writes Parquet, or the Arrow IPC file format when file_format is "arrow".
+    stage = "arrow_write"
+
+    def __init__(self, path, file_format="parquet", batch_rows=ARROW_BATCH_ROWS):
+        import_pyarrow()
+        self.schema = arrow_schema()
+        self.batch_rows = batch_rows
+        self.buffer = []
+        if file_format == "arrow":
+            self.writer = pyarrow.ipc.new_file(path, self.schema)
+        else:
+            self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_rows(self, rows):
+        with stage_timer(self.stage):
+            self.buffer.extend(typed_row(row) for row in rows)
+            if len(self.buffer) >= self.batch_rows:
+                self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        columns = zip(*self.buffer)
+        arrays = [pyarrow.array(values, type=field.type) for values, field in zip(columns, self.schema)]
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self.buffer.clear()
+
+    def close(self):
+        with stage_timer(self.stage):
+            self.flush()
+            self.writer.close()
+
+def sqlite_column_name(col):
+    # Money columns hold integer cents in SQLite, and their names say so
+    return col.replace("($)", "(cents)") if col in MONEY_COLUMNS else col
+
+class SqliteSink(OutputSink):
+    # Loads rows into SQLITE_TABLE with batched inserts and indexes PR Number and CLIN once loading is done.
+    # keep_files lists documents whose rows survive from a resumed run; otherwise the table starts empty.
+    # Amounts are stored as INTEGER cents: SQLite has no decimal type and turns NUMERIC or decimal
+    # text into floating point, so only integers keep SUM() over amounts exact.
+    stage = "sqlite_write"
+
+    def __init__(self, path, keep_files=None, batch_rows=SQLITE_BATCH_ROWS):
+        self.batch_rows = batch_rows
+        self.buffer = []
+        self.connection = sqlite3.connect(path)
+
+        column_defs = []
+        for col in COLUMNS:
+            column_type = "INTEGER" if col in MONEY_COLUMNS or col == "Quantity" else "TEXT"
+            column_defs.append(f'"{sqlite_column_name(col)}" {column_type}')
+
+        with self.connection:
+            if keep_files is None:
+                self.connection.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {SQLITE_TABLE} ({', '.join(column_defs)})")
+            if keep_files is not None:
+                self.connection.execute("CREATE TEMP TABLE keep_files (name TEXT PRIMARY KEY)")
+                self.connection.executemany("INSERT INTO keep_files VALUES (?)", [(name,) for name in keep_files])
+                self.connection.execute(
+                    f'DELETE FROM {SQLITE_TABLE} WHERE "Source File" NOT IN (SELECT name FROM keep_files)'
+                )
+                self.connection.execute("DROP TABLE keep_files")
+        self.insert_sql = f"INSERT INTO {SQLITE_TABLE} VALUES ({', '.join('?' * len(COLUMNS))})"
+
+    def write_rows(self, rows):
+        with stage_timer(self.stage):
+            for row in rows:
+                values = typed_row(row)
+                for i, value in enumerate(values):
+                    if isinstance(value, Decimal):
+                        values[i] = int(value.scaleb(2))
+                    elif hasattr(value, "isoformat"):
+                        values[i] = value.isoformat()
+                self.buffer.append(values)
+            if len(self.buffer) >= self.batch_rows:
+                self.flush()
+
+    def flush(self):
+        if self.buffer:
+            with self.connection:
+                self.connection.executemany(self.insert_sql, self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        with stage_timer(self.stage):
+            self.flush()
+            with self.connection:
+                self.connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS {SQLITE_TABLE}_pr_number ON {SQLITE_TABLE} ("PR Number")'
+                )
+                self.connection.execute(f'CREATE INDEX IF NOT EXISTS {SQLITE_TABLE}_clin ON {SQLITE_TABLE} ("CLIN")')
+            self.connection.close()
+
+# -----------------------------
+# Library API
+# -----------------------------
+
+def process_pdf(pdf_path):
+    # Parses one PDF in the calling process and yields its rows in COLUMNS order
+    structured_data, line_items, _, _ = parse_pdf_file(pdf_path)
+    yield from build_rows(get_filename_from_path(pdf_path), structured_data, line_items)
+
+def iter_document_results(pdf_paths, workers=NUM_WORKERS, manifest=None, page_cache_path=None,
+                          dedup=DEDUPLICATE, filenames=None, pool=None):
+    # Runs the whole pipeline (dedup, manifest lookups, extraction) and yields
+    # (structured_data, line_items, error) for every path, in order. A WorkerPool passed as
+    # pool does the fingerprinting and extraction in place of pools started for this call.
+    if filenames is None:
+        filenames = [get_filename_from_path(pdf_path) for pdf_path in pdf_paths]
+    # Each file is hashed once; files already in the manifest reuse its recorded fingerprints
+    file_hashes = [hash_file(pdf_path) for pdf_path in pdf_paths] if dedup or manifest is not None else None
+    fingerprints = dict(manifest.fingerprints) if manifest is not None else {}
+    if dedup:
+        original_of = find_duplicates(pdf_paths, workers, file_hashes, fingerprints, pool)
+    else:
+        original_of = [None] * len(pdf_paths)
+    unique = [index for index, original in enumerate(original_of) if original is None]
+    unique_paths = [pdf_paths[index] for index in unique]
+    if len(unique_paths) < len(pdf_paths):
+        logger.info("Skipping %d duplicate PDFs", len(pdf_paths) - len(unique_paths))
+
+    if manifest is not None:
+        unique_hashes = [file_hashes[index] for index in unique]
+        results = iter_incremental_results(unique_paths, manifest, workers, page_cache_path,
+                                           unique_hashes, fingerprints, pool)
+    else:
+        results = iter_batch_results(unique_paths, workers, page_cache_path, pool)
+    return iter_with_duplicates(filenames, original_of, results)
+
+def write_document_results(filenames, results, sinks, errors):
+    # Feeds every sink the same rows, built once per document; returns the number of rows written
+    row_count = 0
+    for filename, (structured_data, line_items, error) in zip(filenames, results):
+        if error is not None:
+            errors.record(filename, error)
+            continue
+        rows = list(build_rows(filename, structured_data, line_items))
+        for sink in sinks:
+            sink.write_rows(rows)
+        row_count += len(rows)
+    return row_count
+
+def process_folder(folder=PDF_FOLDER, output_csv=OUTPUT_CSV, workers=NUM_WORKERS, resume=False,
+                   incremental=False, page_cache=False, dedup=DEDUPLICATE, parquet=None, arrow=None,
+                   sqlite=None, error_report=ERROR_REPORT, timing_report=None, recursive=False, shard=None):
+    # Processes every PDF in folder into output_csv (and any extra sinks) and returns a summary.
+    # folder may also be a ZIP or TAR archive; archives inside folder are read in place too.
+    # With shard=(index, count) only that shard's PDFs are processed, into a partial CSV; every
+    # per-run file gets the shard suffix so nodes sharing a filesystem never write the same file.
+    global PROFILING, _timings, _batch_tiers
+
+    outer_profiling, outer_timings, outer_tiers = PROFILING, _timings, _batch_tiers
+    if timing_report:
+        PROFILING, _timings = True, BatchTimings()
+    _batch_tiers = {} if TIERED_EXTRACTION else None
+
+    all_sources = list_pdf_sources(folder, recursive)
+    manifest_file, page_cache_file = MANIFEST_FILE, PAGE_CACHE_FILE
+    if shard is not None:
+        source_index = {name: index for index, (name, _) in enumerate(all_sources)}
+        all_sources = [(name, source) for name, source in all_sources if shard_of(name, shard[1]) == shard[0]]
+        manifest_file, page_cache_file, error_report = (
+            shard_path(path, *shard) for path in (manifest_file, page_cache_file, error_report)
+        )
+
+    try:
+        with contextlib.ExitStack() as stack:
+            if shard is not None:
+                output = stack.enter_context(ShardCsvWriter(shard_path(output_csv, *shard), source_index))
+            else:
+                output = stack.enter_context(CsvStreamWriter(output_csv, resume=resume))
+            errors = stack.enter_context(ErrorReport(error_report))
+
+            sinks = [output]
+            if parquet:
+                sinks.append(stack.enter_context(ArrowSink(parquet)))
+            if arrow:
+                sinks.append(stack.enter_context(ArrowSink(arrow, file_format="arrow")))
+            if sqlite:
+                keep_files = output.completed_files if resume else None
+                sinks.append(stack.enter_context(SqliteSink(sqlite, keep_files)))
+
+            manifest = stack.enter_context(Manifest(manifest_file)) if incremental else None
+            sources = [(name, source) for name, source in all_sources if name not in output.completed_files]
+            filenames = [name for name, _ in sources]
+            pdf_paths = [source for _, source in sources]
+
+            results = iter_document_results(pdf_paths, workers, manifest,
+                                            page_cache_file if page_cache else None, dedup, filenames)
+            row_count = write_document_results(filenames, results, sinks, errors)
+
+        summary = {"documents": len(filenames), "rows": row_count, "failed": errors.count}
+        if _batch_tiers is not None:
+            summary["pages_by_tier"] = dict(sorted(_batch_tiers.items()))
+        if timing_report:
+            _timings.write_report(timing_report)
+    finally:
+        PROFILING, _timings, _batch_tiers = outer_profiling, outer_timings, outer_tiers
+
+    return summary
+
+# -----------------------------
+# Sharding
+# -----------------------------
+
+def shard_of(name, shard_count):
+    # Stable across hosts and Python runs, unlike hash(), so every node agrees on the split
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+def shard_path(path, shard_index, shard_count):
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard_index}-of-{shard_count}{ext}"
+
+def merge_shard_outputs(output_csv=OUTPUT_CSV, shard_count=1):
+    # Combines every shard's partial CSV into output_csv, in the order a single-node run writes.
+    # Each partial is already in input order, so a streaming k-way merge on Source Index suffices.
+    paths = [shard_path(output_csv, index, shard_count) for index in range(shard_count)]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Shard outputs not finished yet: {', '.join(missing)}")
+
+    row_count = 0
+    with contextlib.ExitStack() as stack:
+        readers = []
+        for path in paths:
+            reader = csv.reader(stack.enter_context(open(path, newline='')))
+            if next(reader, None) != ShardCsvWriter.header:
+                raise ValueError(f"Cannot merge {path}: its header does not match the current columns")
+            readers.append(reader)
+
+        tmp_path = output_csv + ".tmp"
+        with open(tmp_path, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(COLUMNS)
+            for row in heapq.merge(*readers, key=lambda row: int(row[0])):
+                writer.writerow(row[1:])
+                row_count += 1
+        os.replace(tmp_path, output_csv)
+    return row_count
+
+# -----------------------------
+# Engine Comparison
+# -----------------------------
+
+# Fields compared between engines; CLIN and SLIN are the matching key
+COMPARED_ITEM_COLUMNS = LINE_ITEM_COLUMNS[2:]
+
+def keyed_line_items(line_items):
+    # Keys items by CLIN, SLIN and occurrence so repeated codes still pair up in order
+    seen = {}
+    keyed = {}
+    for item in line_items:
+        code = (item["CLIN"], item["SLIN"])
+        seen[code] = seen.get(code, 0) + 1
+        keyed[code + (seen[code],)] = item
+    return keyed
+
+def compare_engines(pdf_paths, report_path=ENGINE_COMPARISON_REPORT):
+    # Runs every line item engine over the same documents in-process and writes a JSON report of
+    # each engine's speed and how often the geometry engine agrees with the text engine per field
+    global LINE_ITEM_ENGINE
+
+    outer_engine = LINE_ITEM_ENGINE
+    totals = {engine: {"seconds": 0.0, "items": 0} for engine in LINE_ITEM_ENGINES}
+    matched = 0
+    unmatched = {engine: 0 for engine in LINE_ITEM_ENGINES}
+    field_agreement = {field: 0 for field in COMPARED_ITEM_COLUMNS}
+    page_count = 0
+
+    try:
+        for pdf_path in pdf_paths:
+            with open_pdf_source(pdf_path) as pdf_input, pdfplumber.open(pdf_input) as pdf:
+                page_count += len(pdf.pages)
+
+            items_by_engine = {}
+            for engine in LINE_ITEM_ENGINES:
+                LINE_ITEM_ENGINE = engine
+                start = time.perf_counter()
+                _, line_items = parse_pdf_data(iter_pdf_pages(pdf_path))
+                totals[engine]["seconds"] += time.perf_counter() - start
+                totals[engine]["items"] += len(line_items)
+                items_by_engine[engine] = keyed_line_items(line_items)
+
+            text_items, geometry_items = items_by_engine["text"], items_by_engine["geometry"]
+            unmatched["text"] += len(text_items.keys() - geometry_items.keys())
+            unmatched["geometry"] += len(geometry_items.keys() - text_items.keys())
+            for key in text_items.keys() & geometry_items.keys():
+                matched += 1
+                for field in COMPARED_ITEM_COLUMNS:
+                    if text_items[key][field] == geometry_items[key][field]:
+                        field_agreement[field] += 1
+    finally:
+        LINE_ITEM_ENGINE = outer_engine
+
+    engines = {}
+    for engine, total in totals.items():
+        seconds = total["seconds"]
+        engines[engine] = {
+            "seconds": round(seconds, 6),
+            "pages_per_second": round(page_count / seconds, 2) if seconds else None,
+            "items_per_second": round(total["items"] / seconds, 2) if seconds else None,
+            "line_items": total["items"],
+            "unmatched_items": unmatched[engine],
+        }
+    report = {
+        "documents": len(pdf_paths),
+        "pages": page_count,
+        "engines": engines,
+        "matched_items": matched,
+        "field_agreement": {
+            field: round(count / matched, 4) if matched else None
+            for field, count in field_agreement.items()
+        },
+    }
+    with open(report_path, "w") as file:
+        json.dump(report, file, indent=2)
+    return report
+
+# -----------------------------
+# Watch Mode
+# -----------------------------
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def watch_folder(folder=PDF_FOLDER, output_csv=OUTPUT_CSV, interval=WATCH_INTERVAL, workers=1,
+                 incremental=False, page_cache=False, dedup=DEDUPLICATE, error_report=ERROR_REPORT,
+                 stop_event=None):
+    # Keeps one warm process polling folder and appends rows for new or changed PDFs as they land.
+    # A file is picked up once its size and mtime are unchanged across two scans, so files still
+    # being copied in are not read half-written. Runs until stop_event is set.
+    if stop_event is None:
+        stop_event = threading.Event()
+
+    with contextlib.ExitStack() as stack:
+        output = stack.enter_context(CsvStreamWriter(output_csv, resume=True))
+        errors = stack.enter_context(ErrorReport(error_report))
+        manifest = stack.enter_context(Manifest(MANIFEST_FILE)) if incremental else None
+        page_cache_path = PAGE_CACHE_FILE if page_cache else None
+        # One set of worker processes serves every poll instead of a pool per batch
+        pool = None
+        if workers > 1 or DOCUMENT_MEMORY_LIMIT_MB:
+            pool = stack.enter_context(WorkerPool(workers))
+
+        # Signature of the version of each file whose rows are in the output
+        written = {}
+        for filename in list_pdf_files(folder):
+            if filename in output.completed_files:
+                written[filename] = file_signature(os.path.join(folder, filename))
+        previous_scan = {}
+
+        logger.info("Watching %s for new or changed PDFs every %s seconds", folder, interval)
+        while not stop_event.is_set():
+            scan = {}
+            for filename in list_pdf_files(folder):
+                try:
+                    scan[filename] = file_signature(os.path.join(folder, filename))
+                except FileNotFoundError:
+                    continue
+
+            ready = [
+                filename for filename, signature in scan.items()
+                if written.get(filename) != signature and previous_scan.get(filename) == signature
+            ]
+            if ready:
+                replaced = [filename for filename in ready if filename in written]
+                if replaced:
+                    output.remove_documents(replaced)
+                pdf_paths = [os.path.join(folder, filename) for filename in ready]
+                results = iter_document_results(pdf_paths, workers, manifest, page_cache_path, dedup,
+                                                pool=pool)
+                row_count = write_document_results(ready, results, [output], errors)
+                for filename in ready:
+                    written[filename] = scan[filename]
+                logger.info("Processed %d new or changed PDFs (%d rows)", len(ready), row_count)
+
+            previous_scan = scan
+            stop_event.wait(interval)
+
+# -----------------------------
+# Command Line
+# -----------------------------
+
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 0 and {count - 1}")
+    return index, count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract contract line items from PDFs into a CSV file.")
+    parser.add_argument("--input", default=PDF_FOLDER, metavar="PATH",
+                        help=f"folder, ZIP or TAR archive to read PDFs from; archives inside the folder "
+                             f"are read in place (default: {PDF_FOLDER})")
+    parser.add_argument("--recursive", action="store_true", help="also read PDFs in subfolders of --input")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS,
+                        help=f"number of worker processes (default: {NUM_WORKERS}, 1 runs in-process)")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"keep the documents already written to {OUTPUT_CSV} and process only the rest")
+    parser.add_argument("--log-level", default=LOG_LEVEL,
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        help=f"minimum level written to {DEBUG_LOG} (default: {LOG_LEVEL})")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"reuse results recorded in {MANIFEST_FILE} for PDFs whose content has not changed")
+    parser.add_argument("--page-cache", action="store_true",
+                        help=f"cache extracted page text in {PAGE_CACHE_FILE} so re-parsing skips pdfplumber")
+    parser.add_argument("--parse-memo", action="store_true",
+                        help=f"keep parse results of seen page texts in {PARSE_MEMO_FILE} across runs and workers")
+    parser.add_argument("--timing-report", nargs="?", const=TIMING_REPORT, metavar="PATH",
+                        help=f"record per-stage timings and write a JSON summary (default path: {TIMING_REPORT})")
+    parser.add_argument("--parquet", metavar="PATH", help="also write typed rows to a Parquet file")
+    parser.add_argument("--arrow", metavar="PATH", help="also write typed rows to an Arrow IPC file")
+    parser.add_argument("--sqlite", metavar="PATH",
+                        help="also load rows into an SQLite database, with amounts in integer cents")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false", default=DEDUPLICATE,
+                        help="parse every file even when it duplicates an earlier one")
+    parser.add_argument("--read-ahead", type=int, default=READ_AHEAD, metavar="N",
+                        help=f"PDFs to read on background threads ahead of parsing, 0 for none (default: {READ_AHEAD})")
+    parser.add_argument("--no-mmap", dest="mmap_input", action="store_false",
+                        help="open PDFs by path instead of memory-mapping them")
+    parser.add_argument("--timeout", type=float, default=DOCUMENT_TIMEOUT, metavar="SECONDS",
+                        help=f"time budget per document, 0 for none (default: {DOCUMENT_TIMEOUT})")
+    parser.add_argument("--memory-limit", type=int, default=DOCUMENT_MEMORY_LIMIT_MB, metavar="MB",
+                        help="address-space budget per worker process in MB (default: none)")
+    parser.add_argument("--no-page-screening", dest="page_screening", action="store_false",
+                        help="run full text extraction on every page instead of only schedule and header pages")
+    parser.add_argument("--tiered", action="store_true", default=TIERED_EXTRACTION,
+                        help="read page text from pdfium first and run layout extraction only on pages "
+                             "that fail the quality check, and report how many pages each tier handled")
+    parser.add_argument("--engine", choices=LINE_ITEM_ENGINES, default=LINE_ITEM_ENGINE,
+                        help="how line items are read: 'text' parses page text, 'geometry' reads table "
+                             f"cells by column position (default: {LINE_ITEM_ENGINE})")
+    parser.add_argument("--compare-engines", nargs="?", const=ENGINE_COMPARISON_REPORT, metavar="PATH",
+                        help="run both line item engines on every PDF and write a speed and agreement report "
+                             f"instead of the CSV (default path: {ENGINE_COMPARISON_REPORT})")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="process only shard I of N (0-based), chosen by a hash of each file name, "
+                             f"into {shard_path(OUTPUT_CSV, 'I', 'N')}")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help=f"merge the partial outputs of N finished shards into {OUTPUT_CSV} and exit")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and append rows for new or changed PDFs in --input")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, metavar="SECONDS",
+                        help=f"seconds between folder scans in --watch mode (default: {WATCH_INTERVAL})")
+    args = parser.parse_args(argv)
+    if args.resume and (args.parquet or args.arrow):
+        parser.error("--resume cannot be combined with --parquet or --arrow; columnar files are written in one pass")
+    if args.watch and (args.parquet or args.arrow or args.sqlite or args.timing_report):
+        parser.error("--watch only writes the CSV output")
+    if args.watch and (args.recursive or os.path.isfile(args.input)):
+        parser.error("--watch only scans the PDFs directly inside a folder")
+    if args.shard and (args.resume or args.watch or args.parquet or args.arrow or args.sqlite):
+        parser.error("--shard writes a partial CSV only; it cannot be combined with --resume, --watch "
+                     "or other output formats")
+    return args
+
+def main(argv=None):
+    global PAGE_SCREENING, DOCUMENT_TIMEOUT, DOCUMENT_MEMORY_LIMIT_MB, LINE_ITEM_ENGINE, PARSE_MEMO_PATH
+    global READ_AHEAD, MMAP_INPUT, TIERED_EXTRACTION
+
+    args = parse_args(argv)
+    PAGE_SCREENING = args.page_screening
+    DOCUMENT_TIMEOUT = args.timeout
+    DOCUMENT_MEMORY_LIMIT_MB = args.memory_limit
+    LINE_ITEM_ENGINE = args.engine
+    READ_AHEAD = args.read_ahead
+    MMAP_INPUT = args.mmap_input
+    TIERED_EXTRACTION = args.tiered
+    if args.parse_memo:
+        PARSE_MEMO_PATH = shard_path(PARSE_MEMO_FILE, *args.shard) if args.shard else PARSE_MEMO_FILE
+    log_listener = start_logging(args.log_level)
+
+    try:
+        if args.merge_shards:
+            try:
+                row_count = merge_shard_outputs(OUTPUT_CSV, args.merge_shards)
+            except FileNotFoundError as e:
+                raise SystemExit(str(e))
+            print(f"Merged {args.merge_shards} shards ({row_count} rows) into {OUTPUT_CSV}")
+            return
+
+        if args.compare_engines:
+            pdf_paths = [source for _, source in list_pdf_sources(args.input, args.recursive)]
+            report = compare_engines(pdf_paths, args.compare_engines)
+            for engine, stats in report["engines"].items():
+                print(f"{engine}: {stats['line_items']} line items in {stats['seconds']:.2f}s")
+            print(f"Engine comparison written to {args.compare_engines}")
+            return
+
+        if args.watch:
+            print(f"Watching {args.input} for new PDFs; press Ctrl+C to stop")
+            try:
+                watch_folder(args.input, OUTPUT_CSV, args.interval, args.workers, args.incremental,
+                             args.page_cache, args.dedup)
+            except KeyboardInterrupt:
+                pass
+            return
+
+        summary = process_folder(args.input, OUTPUT_CSV, args.workers, args.resume, args.incremental,
+                                 args.page_cache, args.dedup, args.parquet, args.arrow, args.sqlite,
+                                 timing_report=args.timing_report, recursive=args.recursive, shard=args.shard)
+    finally:
+        stop_logging(log_listener)
+
+    if args.shard:
+        print(f"Shard {args.shard[0]} of {args.shard[1]} complete! Data written to {shard_path(OUTPUT_CSV, *args.shard)}")
+    else:
+        print(f"Extraction complete! Data written to {OUTPUT_CSV}")
+    if summary["failed"]:
+        error_report = shard_path(ERROR_REPORT, *args.shard) if args.shard else ERROR_REPORT
+        print(f"{summary['failed']} document(s) failed; see {error_report}")
+    if args.tiered:
+        tiers = summary["pages_by_tier"]
+        print(f"Page text: {tiers.get('fast', 0)} page(s) from the fast tier, "
+              f"{tiers.get('layout', 0)} escalated to layout extraction, {tiers.get('cache', 0)} from the page cache")
+    if args.timing_report:
+        print(f"Timing report written to {args.timing_report}")
 
-# Main batch processor
 if __name__ == "__main__":
-    if DEBUG_MODE and os.path.exists(DEBUG_LOG):
-        os.remove(DEBUG_LOG)
-
-    all_results = []
-    for filename in os.listdir(PDF_FOLDER):
-        if filename.lower().endswith(".pdf"):
-            pdf_path = os.path.join(PDF_FOLDER, filename)
-            extracted_data = extract_pdf_text(pdf_path)
-            structured_data, line_items = parse_pdf_data(extracted_data)
-            all_results.append({
-                "source_file": filename,
-                "structured_data": structured_data,
-                "line_items": line_items
-            })
-    write_to_csv(all_results)
-    print("Extraction complete! Data written to output.csv")
\ No newline at end of file
+    main()
@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import zlib
+
+import ark
+
+# Corpus shape
+BENCH_DOCUMENTS = 20
+BENCH_PAGES = 6
+BENCH_SEED = 1
+CLINS_PER_PAGE = 6
+SLIN_DENSITY = 1.5
+MULTILINE_TITLE_RATE = 0.3
+NSP_RATE = 0.15
+OPTION_RATE = 0.2
+
+# A run fails when throughput drops more than this fraction below the baseline
+REGRESSION_THRESHOLD = 0.2
+BENCH_OUTPUT = "bench_output.txt"
+
+# Page geometry: Courier at 9 points, so every character is 5.4 points wide
+FONT_SIZE = 9
+CHAR_WIDTH = FONT_SIZE * 0.6
+LINE_HEIGHT = 12
+PAGE_TOP = 760
+PAGE_BOTTOM = 60
+# Left edges of the schedule columns; numeric columns are right-aligned to RIGHT_EDGES instead
+COLUMN_EDGES = (40, 100, 330, 390, 430, 520)
+RIGHT_EDGES = {2: 380, 4: 510, 5: 580}
+
+TITLE_WORDS = (
+    "Base", "Period", "Services", "Maintenance", "Support", "Software", "License", "Hardware",
+    "Training", "Travel", "Labor", "Engineering", "Program", "Management", "Data", "Reports",
+)
+UNITS = ("EA", "LO", "MO", "HR", "YR", "LS")
+
+# -----------------------------
+# Synthetic Corpus
+# -----------------------------
+
+def escape_pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, pages):
+    # Minimal single-font PDF writer. Each page is a list of lines; a line is either a string
+    # or a list of (x, text) runs placed on the same baseline.
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>", b""]
+    font_id, pages_id = 1, 2
+    page_ids = []
+    for lines in pages:
+        content = [f"BT /F1 {FONT_SIZE} Tf"]
+        y = PAGE_TOP
+        for line in lines:
+            runs = [(COLUMN_EDGES[0], line)] if isinstance(line, str) else line
+            for x, text in runs:
+                content.append(f"1 0 0 1 {x:.1f} {y} Tm ({escape_pdf_text(text)}) Tj")
+            y -= LINE_HEIGHT
+        content.append("ET")
+        data = zlib.compress("\n".join(content).encode("latin-1"))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(data), data))
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                       % (pages_id, font_id, len(objects)))
+        page_ids.append(len(objects))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, len(objects), xref_offset)
+    with open(path, "wb") as file:
+        file.write(output)
+
+def schedule_row(cells):
+    runs = []
+    for column, text in enumerate(cells):
+        if not text:
+            continue
+        if column in RIGHT_EDGES:
+            runs.append((RIGHT_EDGES[column] - len(text) * CHAR_WIDTH, text))
+        else:
+            runs.append((COLUMN_EDGES[column], text))
+    return runs
+
+def continuation_row(text):
+    return [(COLUMN_EDGES[1], text)]
+
+def random_title(rng):
+    return " ".join(rng.sample(TITLE_WORDS, rng.randint(2, 4)))
+
+def line_item_rows(rng, code):
+    # Rows for one CLIN or SLIN: the priced line plus any title continuations and trailers
+    title = random_title(rng)
+    roll = rng.random()
+    if roll < NSP_RATE:
+        rows = [schedule_row([code, title, "", "", "NSP", "NSP"]), continuation_row("Not Separately Priced")]
+    else:
+        quantity = rng.randint(1, 24)
+        unit_price = rng.randint(100, 500000) / 100
+        amount = quantity * unit_price
+        if roll < NSP_RATE + OPTION_RATE:
+            title = "Option Period " + title
+        rows = [schedule_row([code, title, str(quantity), rng.choice(UNITS),
+                              f"{unit_price:,.2f}", f"${amount:,.2f}"])]
+    if rng.random() < MULTILINE_TITLE_RATE:
+        for _ in range(rng.randint(1, 3)):
+            rows.append(continuation_row(random_title(rng)))
+    if roll >= NSP_RATE + OPTION_RATE and rng.random() < 0.5:
+        rows.append(continuation_row("Period of Performance: 01/01/2025 to 12/31/2025"))
+    return rows
+
+def contract_pages(rng, number, page_count):
+    # A header page, schedule pages, then clause pages; every contract has at least one schedule page
+    page_count = max(page_count, 2)
+    header = [
+        "SOLICITATION/CONTRACT/ORDER FOR COMMERCIAL ITEMS",
+        "REQUISITION NUMBER",
+        f"RCS-{rng.randint(1000, 9999)}-B{number}",
+        "ISSUED BY: General Services Administration",
+    ]
+    pages = [header]
+    lines_per_page = (PAGE_TOP - PAGE_BOTTOM) // LINE_HEIGHT
+    schedule_pages = max(1, page_count // 2)
+    clin = 0
+    for _ in range(schedule_pages):
+        page = [
+            "SCHEDULE OF SUPPLIES/SERVICES",
+            schedule_row(["ITEM NO.", "SUPPLIES/SERVICES", "QUANTITY", "UNIT", "UNIT PRICE", "AMOUNT"]),
+        ]
+        for _ in range(CLINS_PER_PAGE):
+            clin += 1
+            rows = line_item_rows(rng, f"{clin:04d}")
+            slin_count = int(SLIN_DENSITY) + (rng.random() < SLIN_DENSITY % 1)
+            for slin in range(slin_count):
+                rows += line_item_rows(rng, f"{clin:04d}A{chr(ord('A') + slin % 26)}")
+            rows.append("Obligated Amount: $0.00")
+            if len(page) + len(rows) >= lines_per_page:
+                break
+            page += rows
+        page.append("Continued ...")
+        pages.append(page)
+    while len(pages) < page_count:
+        pages.append([f"52.212-{i} Contract Terms and Conditions clause text" for i in range(lines_per_page)])
+    return pages
+
+def generate_corpus(folder, documents=BENCH_DOCUMENTS, pages=BENCH_PAGES, seed=BENCH_SEED):
+    # Deterministic for a given seed, so runs against the same settings compare like for like
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    for number in range(documents):
+        write_pdf(os.path.join(folder, f"Contract_{number:04d}.pdf"), contract_pages(rng, number, pages))
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def peak_memory_mb():
+    # ru_maxrss is in kilobytes on Linux; worker processes report through RUSAGE_CHILDREN
+    self_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(self_peak, child_peak) / 1024, 1)
+
+def run_benchmark(corpus, workers, work_dir):
+    timing_path = os.path.join(work_dir, "timing_report.json")
+    start = time.perf_counter()
+    summary = ark.process_folder(corpus, os.path.join(work_dir, "output.csv"), workers,
+                                 dedup=False, error_report=os.path.join(work_dir, "errors.csv"),
+                                 timing_report=timing_path)
+    wall_seconds = time.perf_counter() - start
+    with open(timing_path) as file:
+        timings = json.load(file)
+
+    pages, line_items = timings["pages"], timings["line_items"]
+    return {
+        "engine": ark.LINE_ITEM_ENGINE,
+        "tiered": ark.TIERED_EXTRACTION,
+        "workers": workers,
+        "documents": timings["documents"],
+        "pages": pages,
+        "line_items": line_items,
+        "wall_seconds": round(wall_seconds, 4),
+        "pages_per_second": round(pages / wall_seconds, 2),
+        "items_per_second": round(line_items / wall_seconds, 2),
+        "peak_memory_mb": peak_memory_mb(),
+        "pages_by_tier": summary.get("pages_by_tier", {}),
+        "stages": {
+            stage: {
+                "seconds": stats["total_seconds"],
+                "pages_per_second": round(pages / stats["total_seconds"], 2) if stats["total_seconds"] else None,
+                "items_per_second": round(line_items / stats["total_seconds"], 2) if stats["total_seconds"] else None,
+            }
+            for stage, stats in timings["stages"].items()
+        },
+    }
+
+def find_regressions(result, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for metric in ("pages_per_second", "items_per_second"):
+        floor = baseline[metric] * (1 - threshold)
+        if result[metric] < floor:
+            regressions.append(f"{metric} {result[metric]} is below {floor:.2f} "
+                               f"(baseline {baseline[metric]}, threshold {threshold:.0%})")
+    return regressions
+
+def format_result(result):
+    lines = [
+        f"engine={result['engine']} tiered={result['tiered']} workers={result['workers']} "
+        f"documents={result['documents']} pages={result['pages']} line_items={result['line_items']}",
+        f"wall {result['wall_seconds']:.3f}s  {result['pages_per_second']} pages/s  "
+        f"{result['items_per_second']} items/s  peak {result['peak_memory_mb']} MB",
+    ]
+    if result["tiered"]:
+        tiers = result["pages_by_tier"]
+        lines.append(f"page text: {tiers.get('fast', 0)} fast, {tiers.get('layout', 0)} layout")
+    lines.append(f"{'stage':<36}{'seconds':>10}{'pages/s':>12}{'items/s':>12}")
+    for stage, stats in result["stages"].items():
+        lines.append(f"{stage:<36}{stats['seconds']:>10.4f}{stats['pages_per_second'] or '-':>12}"
+                     f"{stats['items_per_second'] or '-':>12}")
+    return "\n".join(lines)
+
+# -----------------------------
+# Command Line
+# -----------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ark.py on a generated contract corpus.")
+    parser.add_argument("--documents", type=int, default=BENCH_DOCUMENTS,
+                        help=f"number of generated PDFs (default: {BENCH_DOCUMENTS})")
+    parser.add_argument("--pages", type=int, default=BENCH_PAGES,
+                        help=f"pages per PDF; about half are schedule pages (default: {BENCH_PAGES})")
+    parser.add_argument("--clins-per-page", type=int, default=CLINS_PER_PAGE,
+                        help=f"CLINs per schedule page (default: {CLINS_PER_PAGE})")
+    parser.add_argument("--slin-density", type=float, default=SLIN_DENSITY,
+                        help=f"average SLINs per CLIN (default: {SLIN_DENSITY})")
+    parser.add_argument("--multiline-rate", type=float, default=MULTILINE_TITLE_RATE,
+                        help=f"share of line items with continued titles (default: {MULTILINE_TITLE_RATE})")
+    parser.add_argument("--nsp-rate", type=float, default=NSP_RATE,
+                        help=f"share of line items that are not separately priced (default: {NSP_RATE})")
+    parser.add_argument("--option-rate", type=float, default=OPTION_RATE,
+                        help=f"share of line items that are option periods (default: {OPTION_RATE})")
+    parser.add_argument("--seed", type=int, default=BENCH_SEED, help=f"corpus seed (default: {BENCH_SEED})")
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="generate the corpus into DIR and keep it (reused if DIR already has PDFs)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--engine", choices=ark.LINE_ITEM_ENGINES, default=ark.LINE_ITEM_ENGINE,
+                        help=f"line item engine to benchmark (default: {ark.LINE_ITEM_ENGINE})")
+    parser.add_argument("--tiered", action="store_true", help="benchmark tiered text extraction")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write this run's results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="fail if throughput regresses against this baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"allowed fractional throughput drop (default: {REGRESSION_THRESHOLD})")
+    parser.add_argument("--output", default=BENCH_OUTPUT, help=f"text report path (default: {BENCH_OUTPUT})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global CLINS_PER_PAGE, SLIN_DENSITY, MULTILINE_TITLE_RATE, NSP_RATE, OPTION_RATE
+
+    args = parse_args(argv)
+    CLINS_PER_PAGE = args.clins_per_page
+    SLIN_DENSITY = args.slin_density
+    MULTILINE_TITLE_RATE = args.multiline_rate
+    NSP_RATE = args.nsp_rate
+    OPTION_RATE = args.option_rate
+    ark.LINE_ITEM_ENGINE = args.engine
+    ark.TIERED_EXTRACTION = args.tiered
+
+    with tempfile.TemporaryDirectory(prefix="ark-bench-") as work_dir:
+        corpus = args.corpus or os.path.join(work_dir, "corpus")
+        if not (os.path.isdir(corpus) and ark.list_pdf_files(corpus)):
+            generate_corpus(corpus, args.documents, args.pages, args.seed)
+
+        log_listener = ark.start_logging("WARNING", os.path.join(work_dir, "bench_log.txt"))
+        try:
+            result = run_benchmark(corpus, args.workers, work_dir)
+        finally:
+            ark.stop_logging(log_listener)
+
+    report = format_result(result)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(result, json.load(file), args.threshold)
+        report += "\n" + ("\n".join("REGRESSION: " + message for message in regressions)
+                          if regressions else f"No regression against {args.baseline}")
+
+    print(report)
+    with open(args.output, "w") as file:
+        file.write(report + "\n")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(result, file, indent=2)
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
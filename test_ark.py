@@ -0,0 +1,368 @@
+import contextlib
+import hashlib
+import os
+import sqlite3
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+
+import pytest
+
+import ark
+import bench
+
+HEADER = "ITEM NO. SUPPLIES/SERVICES QUANTITY UNIT UNIT PRICE AMOUNT"
+
+def parse_pages(pages):
+    schedule = ark.ScheduleParser()
+    line_items = []
+    for text in pages:
+        if text is None:
+            line_items.extend(schedule.finish())
+        else:
+            line_items.extend(schedule.feed_page(text))
+    line_items.extend(schedule.finish())
+    return [(item["CLIN"], item["SLIN"], item["Title"]) for item in line_items]
+
+@pytest.fixture(params=[0, ark.PARSE_MEMO_ENTRIES], ids=["memo-off", "memo-on"])
+def fresh_memo(request, monkeypatch):
+    monkeypatch.setattr(ark, "PARSE_MEMO_ENTRIES", request.param)
+    monkeypatch.setattr(ark, "PARSE_MEMO_PATH", None)
+    monkeypatch.setattr(ark, "_page_memo", None)
+
+# -----------------------------
+# Schedule Parser
+# -----------------------------
+
+def test_title_carries_onto_continuation_page(fresh_memo):
+    pages = [
+        f"{HEADER}\n0001 Base Services 1 LO 5.00 $5.00\nfor the first year",
+        "and the second year\nObligated Amount: $5.00",
+    ]
+    assert parse_pages(pages) == [("0001", "N/A", "Base Services for the first year and the second year")]
+
+def test_title_does_not_carry_into_clause_page(fresh_memo):
+    pages = [
+        f"{HEADER}\n0001 Base Services 1 LO 5.00 $5.00\nPage of 2",
+        "SECTION I - CONTRACT CLAUSES\n52.212-4 Contract Terms and Conditions\n0002 shall tender",
+    ]
+    assert parse_pages(pages) == [("0001", "N/A", "Base Services Page of 2")]
+
+def test_continuation_page_repeating_header_skips_page_furniture(fresh_memo):
+    pages = [
+        f"{HEADER}\n0001 Base Services 1 LO 5.00 $5.00\nContinued ...",
+        f"CONTINUATION SHEET\n{HEADER}\n0002 Option Services 1 LO 6.00 $6.00",
+    ]
+    assert [code for code, _, _ in parse_pages(pages)] == ["0001", "0002"]
+
+def test_capture_carries_onto_page_starting_with_line_item(fresh_memo):
+    pages = [
+        f"{HEADER}\n0001 Base Services 1 LO 5.00 $5.00\nContinued ...",
+        "0002 Option Services 1 LO 6.00 $6.00\nObligated Amount: $6.00",
+    ]
+    assert [code for code, _, _ in parse_pages(pages)] == ["0001", "0002"]
+
+def test_page_break_closes_open_title(fresh_memo):
+    pages = [f"{HEADER}\n0001 Base Services 1 LO 5.00 $5.00", None, "more words\n0002 Option 1 LO 6.00 $6.00"]
+    assert parse_pages(pages) == [("0001", "N/A", "Base Services")]
+
+def test_memo_result_does_not_depend_on_earlier_documents(monkeypatch):
+    monkeypatch.setattr(ark, "PARSE_MEMO_PATH", None)
+    monkeypatch.setattr(ark, "_page_memo", None)
+    continued = f"{HEADER}\n0001 Base Services 1 LO 5.00 $5.00\nObligated Amount: $5.00\nContinued ..."
+    clauses = "52.212-4 Contract Terms and Conditions"
+    header_last = f"Contract summary\n{HEADER}"
+    next_page = "0002 Option Services 1 LO 6.00 $6.00"
+
+    parse_pages([continued, clauses, header_last])
+    with_memo = parse_pages([header_last, next_page])
+    monkeypatch.setattr(ark, "PARSE_MEMO_ENTRIES", 0)
+    assert with_memo == parse_pages([header_last, next_page])
+
+# -----------------------------
+# PDF Pipeline
+# -----------------------------
+
+def schedule_pdf(tmp_path, pages):
+    path = tmp_path / "contract.pdf"
+    bench.write_pdf(str(path), pages)
+    return str(path)
+
+@pytest.mark.parametrize("screening", [True, False], ids=["screened", "unscreened"])
+def test_pdf_title_stops_at_clause_page(tmp_path, monkeypatch, screening):
+    monkeypatch.setattr(ark, "PAGE_SCREENING", screening)
+    path = schedule_pdf(tmp_path, [
+        ["SCHEDULE OF SUPPLIES/SERVICES", HEADER, "0001 Base Services 1 LO 5.00 $5.00", "Page of 2"],
+        ["SECTION I - CONTRACT CLAUSES", "52.212-4 Contract Terms and Conditions",
+         "shall tender for acceptance"],
+    ])
+    _, line_items = ark.parse_pdf_data(ark.iter_pdf_pages(path))
+    assert [item["Title"] for item in line_items] == ["Base Services Page of 2"]
+
+@pytest.mark.parametrize("screening", [True, False], ids=["screened", "unscreened"])
+def test_pdf_continuation_page_without_header(tmp_path, monkeypatch, screening):
+    monkeypatch.setattr(ark, "PAGE_SCREENING", screening)
+    path = schedule_pdf(tmp_path, [
+        ["SCHEDULE OF SUPPLIES/SERVICES", HEADER, "0001 Base Services 1 LO 5.00 $5.00",
+         "Obligated Amount: $5.00", "Continued ..."],
+        ["0002 Option Services 1 LO 6.00 $6.00", "Obligated Amount: $6.00"],
+        ["52.212-4 Contract Terms and Conditions"],
+    ])
+    _, line_items = ark.parse_pdf_data(ark.iter_pdf_pages(path))
+    assert [item["CLIN"] for item in line_items] == ["0001", "0002"]
+
+# -----------------------------
+# Archive Inputs
+# -----------------------------
+
+@pytest.mark.parametrize("mode", ["w", "w:gz"], ids=["tar", "tar.gz"])
+def test_tar_members_are_read_without_reopening_archive(tmp_path, monkeypatch, mode):
+    archive_path = str(tmp_path / ("contracts.tar" if mode == "w" else "contracts.tar.gz"))
+    contents = {}
+    with tarfile.open(archive_path, mode) as archive:
+        for number in range(3):
+            path = schedule_pdf(tmp_path, [[HEADER, f"000{number + 1} Services 1 LO 5.00 $5.00"]])
+            archive.add(path, f"contract{number}.pdf")
+            with open(path, "rb") as file:
+                contents[f"contract{number}.pdf"] = file.read()
+
+    sources = ark.list_pdf_sources(archive_path)
+    opened = []
+    real_open = tarfile.open
+    monkeypatch.setattr(tarfile, "open", lambda *args, **kwargs: opened.append(args) or real_open(*args, **kwargs))
+    for name, source in sources:
+        with source.open() as file:
+            assert file.read() == contents[name]
+        assert ark.hash_file(source) == hashlib.sha256(contents[name]).hexdigest()
+    assert [name for name, _ in sources] == list(contents)
+    assert opened == []
+
+# -----------------------------
+# Table Geometry Engine
+# -----------------------------
+
+def header_chars(words, char_width=6.0, word_gap=12.0):
+    # Header characters placed by position only, with no space glyphs between words
+    chars, x = [], 36.0
+    for word in words:
+        for letter in word:
+            chars.append({"text": letter, "x0": x, "x1": x + char_width, "top": 100.0, "bottom": 110.0, "size": 10})
+            x += char_width
+        x += word_gap
+    return chars
+
+def test_schedule_columns_found_without_space_glyphs():
+    chars = header_chars(["ITEM", "NO.", "SUPPLIES/SERVICES", "QUANTITY", "UNIT", "UNIT", "PRICE", "AMOUNT"])
+    bottom, column_edges = ark.find_schedule_columns([chars])
+    label_starts = [chars[i]["x0"] for i in (0, 7, 24, 32, 36, 45)]
+    assert bottom == 110.0
+    assert column_edges == label_starts
+
+# -----------------------------
+# Incremental Runs
+# -----------------------------
+
+def test_incremental_rerun_skips_fingerprinting(tmp_path, monkeypatch):
+    folder = tmp_path / "Contracts"
+    folder.mkdir()
+    page = ["SCHEDULE OF SUPPLIES/SERVICES", HEADER, "0001 Base Services 1 LO 5.00 $5.00"]
+    for name in ("a.pdf", "b.pdf"):
+        bench.write_pdf(str(folder / name), [page])
+    monkeypatch.setattr(ark, "MANIFEST_FILE", str(tmp_path / "manifest.jsonl"))
+
+    fingerprinted = []
+    content_stream_hash = ark.content_stream_hash
+    monkeypatch.setattr(ark, "content_stream_hash",
+                        lambda pdf_path: fingerprinted.append(pdf_path) or content_stream_hash(pdf_path))
+
+    def run():
+        output_csv = str(tmp_path / "output.csv")
+        ark.process_folder(str(folder), output_csv, workers=1, incremental=True,
+                           error_report=str(tmp_path / "errors.csv"))
+        with open(output_csv) as file:
+            return file.read()
+
+    first = run()
+    assert len(fingerprinted) == 1
+    assert run() == first
+    assert len(fingerprinted) == 1
+
+def test_incremental_rerun_reparses_after_engine_change(tmp_path, monkeypatch):
+    folder = tmp_path / "Contracts"
+    folder.mkdir()
+    bench.write_pdf(str(folder / "a.pdf"), [["SCHEDULE OF SUPPLIES/SERVICES", HEADER,
+                                             "0001 Base Services 1 LO 5.00 $5.00"]])
+    monkeypatch.setattr(ark, "MANIFEST_FILE", str(tmp_path / "manifest.jsonl"))
+
+    parsed = []
+    process_pdf_file = ark.process_pdf_file
+    monkeypatch.setattr(ark, "process_pdf_file",
+                        lambda pdf_path, *args: parsed.append(pdf_path) or process_pdf_file(pdf_path, *args))
+
+    for engine in ("text", "geometry", "geometry"):
+        monkeypatch.setattr(ark, "LINE_ITEM_ENGINE", engine)
+        ark.process_folder(str(folder), str(tmp_path / "output.csv"), workers=1, incremental=True,
+                           error_report=str(tmp_path / "errors.csv"))
+    assert len(parsed) == 2
+
+def single_page_pdf(path, content, resources, extra_objects=(), comment=b""):
+    # A one-page PDF with the given content stream. Object 5 is a Courier font and extra_objects
+    # are numbered from 6. A comment changes the file's bytes without changing its content.
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << %s >> >>"
+        % resources,
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+        *extra_objects,
+    ]
+    output = bytearray(b"%PDF-1.4\n" + comment)
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    path.write_bytes(bytes(output))
+    return str(path)
+
+def form_xobject_pdf(path, text, comment=b""):
+    # The page's only content is "/Fm0 Do"; the text lives in the Form XObject
+    form = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    form_object = (b"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << /Font << /F1 5 0 R >> >>"
+                   b" /Length %d >>\nstream\n%s\nendstream" % (len(form), form))
+    return single_page_pdf(path, b"/Fm0 Do", b"/XObject << /Fm0 6 0 R >>", [form_object], comment)
+
+def test_documents_differing_only_in_xobjects_are_not_duplicates(tmp_path):
+    paths = [
+        form_xobject_pdf(tmp_path / "a.pdf", "RCS-AAAA"),
+        form_xobject_pdf(tmp_path / "b.pdf", "RCS-BBBB"),
+        form_xobject_pdf(tmp_path / "a-resaved.pdf", "RCS-AAAA", comment=b"% re-saved\n"),
+    ]
+    assert ark.find_duplicates(paths, workers=1) == [None, None, 0]
+
+# -----------------------------
+# Tiered Text Extraction
+# -----------------------------
+
+def column_drawn_schedule_pdf(path):
+    # The schedule table is drawn one column at a time, so pdfium's character stream reads
+    # down each column instead of across each row
+    columns = [
+        (36, ["ITEM NO.", "0001", "0002"]),
+        (100, ["SUPPLIES/SERVICES", "Base Services", "Option Services"]),
+        (260, ["QUANTITY", "1", "2"]),
+        (330, ["UNIT", "LO", "EA"]),
+        (370, ["UNIT PRICE", "5.00", "6.00"]),
+        (460, ["AMOUNT", "$5.00", "$12.00"]),
+    ]
+    content = ["BT /F1 10 Tf", "1 0 0 1 36 740 Tm (SCHEDULE OF SUPPLIES/SERVICES) Tj"]
+    for x, cells in columns:
+        for row, cell in enumerate(cells):
+            content.append(f"1 0 0 1 {x} {720 - 14 * row} Tm ({cell}) Tj")
+    content.append("ET")
+    return single_page_pdf(path, "\n".join(content).encode("latin-1"), b"/Font << /F1 5 0 R >>")
+
+def test_fast_text_fails_for_column_drawn_schedule():
+    assert ark.fast_text_passes(f"{HEADER}\n0001 Base Services 1 LO 5.00 $5.00")
+    assert not ark.fast_text_passes("ITEM NO.\n0001\n0002\nSUPPLIES/SERVICES\nBase Services\nOption Services")
+    assert not ark.fast_text_passes(f"{HEADER}\nBase Services\nOption Services")
+
+@pytest.mark.parametrize("tiered", [False, True], ids=["layout", "tiered"])
+def test_column_drawn_schedule_is_parsed(tmp_path, monkeypatch, tiered):
+    monkeypatch.setattr(ark, "TIERED_EXTRACTION", tiered)
+    path = column_drawn_schedule_pdf(tmp_path / "columns.pdf")
+    _, line_items = ark.parse_pdf_data(ark.iter_pdf_pages(path))
+    assert [item["CLIN"] for item in line_items] == ["0001", "0002"]
+
+# -----------------------------
+# Document Budgets
+# -----------------------------
+
+@pytest.mark.skipif(not hasattr(ark.signal, "SIGALRM"), reason="time budgets need SIGALRM")
+def test_timeout_inside_field_extractor_fails_document(tmp_path, monkeypatch):
+    monkeypatch.setattr(ark, "DOCUMENT_TIMEOUT", 0.2)
+    monkeypatch.setattr(ark, "PARSE_MEMO_ENTRIES", 0)
+    monkeypatch.setitem(ark.TEXT_FIELD_EXTRACTORS, "PR Number", lambda lines: time.sleep(2))
+    path = schedule_pdf(tmp_path, [["REQUISITION NUMBER", "RCS-1", HEADER, "0001 Base Services 1 LO 5.00 $5.00"]])
+    start = time.perf_counter()
+    *_, error = ark.process_pdf_file(path)
+    assert error["error"] == "DocumentTimeout"
+    assert time.perf_counter() - start < 1
+
+# -----------------------------
+# Library API
+# -----------------------------
+
+@pytest.mark.parametrize("tiered", [False, True], ids=["layout", "tiered"])
+def test_process_pdf_yields_rows(tmp_path, monkeypatch, tiered):
+    monkeypatch.setattr(ark, "TIERED_EXTRACTION", tiered)
+    path = schedule_pdf(tmp_path, [["SCHEDULE OF SUPPLIES/SERVICES", HEADER, "0001 Base Services 1 LO 5.00 $5.00"]])
+    rows = list(ark.process_pdf(path))
+    assert [row[ark.COLUMNS.index("CLIN")] for row in rows] == ["0001"]
+
+# -----------------------------
+# Watch Mode
+# -----------------------------
+
+def test_watch_reuses_one_worker_pool_across_polls(tmp_path, monkeypatch):
+    folder = tmp_path / "Contracts"
+    folder.mkdir()
+    output_csv = tmp_path / "output.csv"
+    pools = []
+
+    class CountingExecutor(ark.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(ark, "ProcessPoolExecutor", CountingExecutor)
+
+    def wait_for_rows(count):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if output_csv.exists() and len(output_csv.read_text().splitlines()) == count + 1:
+                return
+            time.sleep(0.05)
+        raise AssertionError(f"expected {count} rows in {output_csv}")
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=ark.watch_folder, args=(str(folder), str(output_csv), 0.05, 2),
+                               kwargs={"error_report": str(tmp_path / "errors.csv"), "stop_event": stop})
+    watcher.start()
+    try:
+        for batch in (1, 2):
+            # Two files per poll, so every batch has work for both workers
+            for number in (batch * 2 - 1, batch * 2):
+                bench.write_pdf(str(folder / f"contract{number}.pdf"), [[HEADER, f"000{number} Services 1 LO 5.00 $5.00"]])
+            wait_for_rows(batch * 2)
+    finally:
+        stop.set()
+        watcher.join()
+    assert len(pools) == 1
+
+# -----------------------------
+# Output Sinks
+# -----------------------------
+
+def test_sqlite_amounts_sum_exactly(tmp_path):
+    item = ark.LineItem(["0001", "N/A", "Services", "1", "0.10", "LO", "0.10"] +
+                        ["N/A"] * (len(ark.LINE_ITEM_COLUMNS) - 7))
+    path = str(tmp_path / "rows.sqlite")
+    with ark.SqliteSink(path) as sink:
+        sink.write_document("a.pdf", {"PR Number": "RCS-1"}, [item] * 3)
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        total, = connection.execute(f'SELECT sum("Amount (cents)") FROM {ark.SQLITE_TABLE}').fetchone()
+    assert total == 30
+
+def test_pyarrow_is_imported_only_for_arrow_output(tmp_path):
+    check = ("import sys, ark; loaded = 'pyarrow' in sys.modules; "
+             f"ark.ArrowSink({str(tmp_path / 'rows.parquet')!r}).close(); print(loaded, 'pyarrow' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True,
+                            cwd=str(tmp_path), env=dict(os.environ, PYTHONPATH=os.path.dirname(ark.__file__)))
+    assert result.stdout.split() == ["False", "True"]